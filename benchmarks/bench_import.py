@@ -0,0 +1,57 @@
+"""Measure CSV import throughput against a generated export
+
+Usage: python benchmarks/bench_import.py [rows]
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from importer import import_csv
+from migrations import migrate
+
+
+def write_csv(path, rows):
+    """Write a watch-style export with ``rows`` workouts"""
+    rng = random.Random(42)
+    start = date(2015, 1, 1)
+    activities = ["Pool Swim", "Open Water Swim", "Run", "Ride", "Strength"]
+    with open(path, "w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["Activity Type", "Date", "Distance", "Calories"])
+        for _ in range(rows):
+            day = start + timedelta(days=rng.randrange(3650))
+            writer.writerow([
+                rng.choice(activities),
+                f"{day.isoformat()} 06:{rng.randrange(60):02d}:00",
+                f"{rng.randrange(200, 5000):,}",
+                rng.randrange(100, 900),
+            ])
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "export.csv")
+        db_path = os.path.join(tmp, "fitness.db")
+
+        write_csv(csv_path, rows)
+        migrate(db_path)
+
+        start = time.perf_counter()
+        imported, skipped = import_csv(csv_path, db_path)
+        elapsed = time.perf_counter() - start
+
+    print(f"rows:      {imported:,} imported, {skipped:,} skipped")
+    print(f"elapsed:   {elapsed:.2f} s")
+    print(f"rows/sec:  {imported / elapsed:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Measure schema migration time on a large legacy fitness.db
+
+Usage: python benchmarks/bench_migrate.py [rows]
+
+Migrates a generated legacy database, then times the reads the app makes
+on the migrated schema: the cache load, the rollup reads behind the charts
+and a one-week day range.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_data import write_workouts
+from migrations import ROLLUP_PERIODS, migrate
+from rollups import read_rollup
+from workout_cache import day_number, read_columns
+
+
+def time_queries(path):
+    """Time the reads the app makes once the database is migrated"""
+    conn = sqlite3.connect(path)
+    timings = {}
+
+    start = time.perf_counter()
+    read_columns(conn)
+    timings["cache load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for period in ROLLUP_PERIODS:
+        read_rollup(conn, period)
+    timings["rollup reads"] = time.perf_counter() - start
+
+    first, last = day_number("2020-01-01"), day_number("2020-01-07")
+    start = time.perf_counter()
+    conn.execute("SELECT COUNT(*) FROM fitness WHERE day BETWEEN ? AND ?", (first, last)).fetchall()
+    timings["one-week range"] = time.perf_counter() - start
+
+    conn.close()
+    return timings
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "fitness.db")
+        write_workouts(path, rows)
+
+        start = time.perf_counter()
+        applied = migrate(path)
+        elapsed = time.perf_counter() - start
+
+        timings = time_queries(path)
+
+    print(f"rows:      {rows:,}")
+    print(f"migrated:  versions {applied} in {elapsed:.2f} s")
+    for name, seconds in timings.items():
+        print(f"{name + ':':<16} {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Check a burst of workout edits costs one refresh of each view
+
+Usage: QT_QPA_PLATFORM=offscreen python benchmarks/bench_refresh.py [rows] [edits]
+
+Starts FitTrack on a generated database with the chart showing, then adds
+``edits`` workouts and deletes them again without returning to the event
+loop, the way a script or macro would. Prints the refresh scheduler's
+counters and exits with status 1 unless the burst caused exactly one flush.
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PyQt5.QtWidgets import QApplication, QMessageBox
+
+from generate_data import write_workouts
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    edits = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    tmp = tempfile.TemporaryDirectory()
+    os.chdir(tmp.name)
+    write_workouts("fitness.db", rows)
+
+    app = QApplication([])
+    import main as fittrack
+
+    QMessageBox.question = staticmethod(lambda *args, **kwargs: QMessageBox.Yes)
+
+    window = fittrack.FitTrack()
+    window.show()
+    while len(window.cache) == 0 or window.refresher.timer.isActive():
+        app.processEvents()
+    window.calculate_calories()
+    while not window.chart_showing():
+        app.processEvents()
+
+    window.refresher.counts.clear()
+    start = time.perf_counter()
+    for i in range(edits):
+        window.kal_box.setText(str(300 + i))
+        window.distance_box.setText("1,500")
+        window.description.setText("Scripted swim")
+        window.add_workout()
+    for _ in range(edits):
+        window.table.selectRow(0)
+        window.delete_workout()
+    burst = time.perf_counter() - start
+
+    start = time.perf_counter()
+    app.processEvents()
+    flush = time.perf_counter() - start
+    counts = window.refresher.counts
+
+    print(f"rows:        {rows:,}")
+    print(f"edits:       {edits} adds + {edits} deletes in {burst * 1000:.1f} ms")
+    print(f"flush:       {flush * 1000:.1f} ms")
+    for name, count in sorted(counts.items()):
+        print(f"  {name:<20} {count}")
+
+    window.close()
+    os.chdir(ROOT)
+    sys.exit(0 if counts["flushes"] == 1 and counts["refreshed stats"] == 1 else 1)
+
+
+if __name__ == "__main__":
+    main()
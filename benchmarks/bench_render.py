@@ -0,0 +1,119 @@
+"""Check chart rendering never blocks the GUI and cached redraws are instant
+
+Usage: QT_QPA_PLATFORM=offscreen python benchmarks/bench_render.py [rows] [max_gap_ms] [hit_budget_ms]
+
+Starts FitTrack on a generated database and records the gap between 1 ms
+timer ticks while each chart mode is rendered on a worker. Then resizes the
+chart and toggles the theme back and forth, timing how long the chart takes
+to show an already rendered size or theme once the resize debounce fires.
+Exits with status 1 if the largest gap or the slowest cached redraw is over
+its limit.
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+
+from generate_data import write_workouts
+
+
+def chart_drawn(window):
+    """Whether the chart view shows the rendered image for the current scene, theme and size
+
+    Charts render on a worker, so this, not chart_showing, marks the end of
+    a chart operation.
+    """
+    if not window.chart_showing() or window.chart_resize_timer.isActive():
+        return False
+    pixmap = window.pixmaps.get(window.chart_key())
+    return pixmap is not None and window.chart_view.pixmap is pixmap
+
+
+def wait_for_pixmap(app, window):
+    while not chart_drawn(window):
+        app.processEvents()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    limit_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 100.0
+    hit_budget_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 16.0
+
+    tmp = tempfile.TemporaryDirectory()
+    os.chdir(tmp.name)
+    write_workouts("fitness.db", rows)
+
+    app = QApplication([])
+    import main as fittrack
+
+    window = fittrack.FitTrack()
+    window.resize(1200, 900)
+    window.show()
+    while len(window.cache) == 0:
+        app.processEvents()
+
+    ticks = []
+    timer = QTimer()
+    timer.timeout.connect(lambda: ticks.append(time.perf_counter()))
+    timer.start(1)
+    start = time.perf_counter()
+    for mode in range(window.chart_mode.count()):
+        window.chart_mode.setCurrentIndex(mode)
+        previous = window.chart_scene
+        window.calculate_calories()
+        while window.chart_scene is previous:
+            app.processEvents()
+        wait_for_pixmap(app, window)
+    window.chart_mode.setCurrentIndex(0)
+    while window.chart_scene[0][0] != "scatter":
+        app.processEvents()
+    wait_for_pixmap(app, window)
+    rendered = time.perf_counter() - start
+    timer.stop()
+    gaps = sorted((b - a) * 1000 for a, b in zip(ticks, ticks[1:]))
+    worst = gaps[-1] if gaps else 0.0
+
+    view = window.chart_view
+    small, large = (view.width() - 200, view.height()), (view.width(), view.height())
+
+    def resize(size):
+        view.setFixedSize(*size)
+
+    # Render every size and theme pairing once, then time returning to them
+    for change in (lambda: resize(small), window.toggle_dark, lambda: resize(large), window.toggle_dark):
+        change()
+        wait_for_pixmap(app, window)
+
+    hits, misses = [], 0
+    for _ in range(10):
+        for change in (lambda: resize(small), lambda: resize(large), window.toggle_dark):
+            change()
+            # Time the chart's part: the resize debounce is deliberate and
+            # the window stylesheet is bench_theme's concern
+            window.chart_resize_timer.stop()
+            start = time.perf_counter()
+            window.render_chart()
+            misses += not chart_drawn(window)
+            view.repaint()
+            hits.append((time.perf_counter() - start) * 1000)
+            wait_for_pixmap(app, window)
+
+    print(f"rows:        {rows:,}")
+    print(f"render:      {window.chart_mode.count()} chart modes in {rendered:.2f} s on a worker")
+    print(f"max gap:     {worst:.1f} ms (limit {limit_ms:.0f} ms)")
+    print(f"cached:      median {sorted(hits)[len(hits) // 2]:.2f} ms, max {max(hits):.2f} ms "
+          f"(budget {hit_budget_ms:.0f} ms), {misses} re-rendered of {len(hits)}")
+
+    window.close()
+    os.chdir(ROOT)
+    sys.exit(0 if worst <= limit_ms and max(hits) <= hit_budget_ms and not misses else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Check the GUI event loop keeps ticking while a large scan runs on a worker
+
+Usage: QT_QPA_PLATFORM=offscreen python benchmarks/bench_responsiveness.py [rows] [max_gap_ms]
+
+Starts FitTrack on a generated database, then records the gap between 1 ms
+timer ticks while the workout cache loads and the chart is prepared in the
+background. Exits with status 1 if the largest gap is over the limit.
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+
+from generate_data import write_workouts
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    limit_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 100.0
+
+    tmp = tempfile.TemporaryDirectory()
+    os.chdir(tmp.name)
+    write_workouts("fitness.db", rows)
+
+    app = QApplication([])
+    import main as fittrack
+
+    window = fittrack.FitTrack()
+    window.show()
+    app.processEvents()
+
+    ticks = []
+    timer = QTimer()
+    timer.timeout.connect(lambda: ticks.append(time.perf_counter()))
+    timer.start(1)
+
+    # Startup already queued the cache load; chart after it arrives
+    start = time.perf_counter()
+    while len(window.cache) == 0:
+        app.processEvents()
+    loaded = time.perf_counter() - start
+
+    window.calculate_calories()
+    while not window.chart_showing():
+        app.processEvents()
+    timer.stop()
+
+    gaps = sorted((b - a) * 1000 for a, b in zip(ticks, ticks[1:]))
+    worst = gaps[-1] if gaps else 0.0
+    p99 = gaps[int(len(gaps) * 0.99)] if gaps else 0.0
+
+    print(f"rows:        {rows:,}")
+    print(f"cache load:  {loaded:.2f} s in background")
+    print(f"ticks:       {len(ticks):,}")
+    print(f"p99 gap:     {p99:.1f} ms")
+    print(f"max gap:     {worst:.1f} ms (limit {limit_ms:.0f} ms)")
+
+    window.close()
+    os.chdir(ROOT)
+    sys.exit(0 if worst <= limit_ms else 1)
+
+
+if __name__ == "__main__":
+    main()
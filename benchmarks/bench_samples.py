@@ -0,0 +1,86 @@
+"""Measure sample storage size and detail plot cost for a long 1 Hz session
+
+Usage: python benchmarks/bench_samples.py [hours] [width]
+
+Stores one workout's heart rate and speed, then times loading it with
+samples.detail_samples and drawing DetailChart at ``width`` pixels, against
+drawing every sample. Exits with status 1 if the downsampled plot loses
+any pixel column's extremes or takes longer than the limit to draw.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from charts import DetailChart
+from migrations import migrate
+from samples import detail_samples, pack_samples, store_samples
+
+DRAW_LIMIT_MS = 100
+
+
+def timed_draw(samples, width):
+    figure = Figure(figsize=(width / 100, 5), dpi=100)
+    FigureCanvasAgg(figure)
+    chart = DetailChart(figure)
+    chart.show(samples, "Long ride")
+    # The first draw also lays out text; time a redraw
+    figure.canvas.draw()
+    start = time.perf_counter()
+    figure.canvas.draw()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 6
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 900
+    count = int(hours * 3600)
+
+    rng = np.random.default_rng(42)
+    times = 1.7e9 + np.arange(count, dtype=np.float64)
+    heart_rate = 140 + 15 * np.sin(times / 600) + rng.normal(0, 4, count)
+    speed = np.clip(7 + np.cumsum(rng.normal(0, 0.05, count)) % 3, 0, None)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "fitness.db")
+        migrate(db_path)
+        conn = sqlite3.connect(db_path)
+        with conn:
+            store_samples(conn, 1, [pack_samples(times, heart_rate, speed)])
+        stored = conn.execute("SELECT length(deltas) + length(heart_rate) + length(speed)"
+                              " FROM workout_samples").fetchone()[0]
+
+        start = time.perf_counter()
+        samples = detail_samples(conn, 1, width)
+        load = (time.perf_counter() - start) * 1000
+        conn.close()
+
+    shown = samples["shown"]["heart_rate"]
+    elapsed, values = samples["elapsed"], samples["heart_rate"]
+    column = np.minimum((elapsed * width / elapsed[-1]).astype(np.intp), width - 1)
+    exact = (np.array_equal(np.maximum.reduceat(values, np.flatnonzero(np.diff(column, prepend=-1))),
+                            np.maximum.reduceat(values[shown], np.flatnonzero(np.diff(column[shown], prepend=-1))))
+             and np.array_equal(np.minimum.reduceat(values, np.flatnonzero(np.diff(column, prepend=-1))),
+                                np.minimum.reduceat(values[shown], np.flatnonzero(np.diff(column[shown], prepend=-1)))))
+
+    downsampled = timed_draw(samples, width)
+    everything = dict(samples, shown={name: np.arange(count) for name in samples["shown"]})
+    full = timed_draw(everything, width)
+
+    print(f"samples:      {count:,} ({hours:g} h at 1 Hz), {stored / count:.1f} bytes each")
+    print(f"load:         {load:.1f} ms (query, unpack, downsample)")
+    print(f"draw:         {downsampled:.1f} ms for {len(shown):,} points per line, "
+          f"{full:.1f} ms for all {count:,}")
+    print(f"extremes:     {'kept' if exact else 'LOST'} in every pixel column")
+    sys.exit(0 if exact and downsampled <= DRAW_LIMIT_MS else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Measure time from process launch to the first paint of the main window
+
+Usage: python benchmarks/bench_startup.py [runs] [rows]
+
+Each run starts a fresh interpreter on a generated database, so the time
+includes interpreter start-up and every import. Set QT_QPA_PLATFORM=offscreen
+to run without a display.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def child(launched):
+    """Open FitTrack and report seconds since ``launched`` at the first paint"""
+    from PyQt5.QtCore import QEvent, QObject
+    from PyQt5.QtWidgets import QApplication
+
+    app = QApplication([])
+    import main as fittrack
+
+    class FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                painted = time.time() - launched
+                print(f"{painted:.4f} {int('matplotlib' in sys.modules)}", flush=True)
+                app.quit()
+            return False
+
+    window = fittrack.FitTrack()
+    watcher = FirstPaint()
+    window.installEventFilter(watcher)
+    window.show()
+    app.exec_()
+    window.close()
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+    from generate_data import write_workouts
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_workouts(os.path.join(tmp, "fitness.db"), rows)
+
+        times = []
+        matplotlib_loaded = False
+        for _ in range(runs):
+            launched = time.time()
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", repr(launched)],
+                cwd=tmp, capture_output=True, text=True, check=True,
+            ).stdout.split()
+            times.append(float(output[0]))
+            matplotlib_loaded |= output[1] == "1"
+
+    print(f"runs:        {runs}")
+    print(f"median:      {statistics.median(times) * 1000:.0f} ms to first paint")
+    print(f"best:        {min(times) * 1000:.0f} ms")
+    print(f"matplotlib:  {'imported' if matplotlib_loaded else 'not imported'} before first paint")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        child(float(sys.argv[2]))
+    else:
+        main()
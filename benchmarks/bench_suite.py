@@ -0,0 +1,180 @@
+"""Time FitTrack's interactive operations at several database sizes
+
+Usage:
+    python benchmarks/bench_suite.py [--sizes 1000,10000,100000,1000000]
+                                     [--repeat 5] [--output results.json]
+    python benchmarks/bench_suite.py --compare before.json after.json
+
+Runs headless (QT_QPA_PLATFORM defaults to offscreen). Each size gets a
+freshly generated database and its own interpreter, since FitTrack opens
+./fitness.db. Results are written as JSON; --compare prints the
+change in median time per operation between two result files.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_SIZES = "1000,10000,100000,1000000"
+
+# Slower than this ratio in --compare is reported as a regression
+REGRESSION_RATIO = 1.2
+
+
+def wait_until(app, done, timeout=600.0):
+    """Process events until ``done()`` is true"""
+    deadline = time.perf_counter() + timeout
+    while not done():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("operation did not finish")
+        app.processEvents()
+
+
+def summarize(samples):
+    """Milliseconds summary of a list of durations in seconds"""
+    ms = [sample * 1000 for sample in samples]
+    return {"median": statistics.median(ms), "min": min(ms), "max": max(ms), "runs": len(ms)}
+
+
+def child(repeat):
+    """Open FitTrack on ./fitness.db, time each operation and print JSON"""
+    from PyQt5.QtWidgets import QApplication, QMessageBox
+    from bench_render import chart_drawn
+
+    app = QApplication([])
+    start = time.perf_counter()
+    import main as fittrack
+
+    # Dialogs would block the run; answer them the way a user would
+    QMessageBox.question = staticmethod(lambda *args, **kwargs: QMessageBox.Yes)
+    QMessageBox.warning = staticmethod(lambda *args, **kwargs: QMessageBox.Ok)
+
+    # FitTrack() opens and migrates ./fitness.db
+    window = fittrack.FitTrack()
+    window.show()
+    timings = {"open and migrate": [time.perf_counter() - start]}
+
+    def timed(name, action, done=None):
+        start = time.perf_counter()
+        action()
+        if done is not None:
+            wait_until(app, done)
+        timings.setdefault(name, []).append(time.perf_counter() - start)
+
+    for _ in range(repeat):
+        version = window.cache.version
+        timed("load cache", window.reload_cache, lambda: window.cache.version != version)
+        timed("load_table", window.load_table)
+        timed("update_stats", window.update_stats)
+
+    # Charts render on a worker; each chart operation ends when its image is
+    # on screen. The first chart also waits for matplotlib to finish loading.
+    drawn = lambda: chart_drawn(window)
+    timed("first chart", window.calculate_calories, drawn)
+    for _ in range(repeat):
+        window.reset()
+        timed("calculate_calories", window.calculate_calories, drawn)
+        timed("toggle_dark", window.toggle_dark, drawn)
+
+    for _ in range(repeat):
+        window.kal_box.setText("1,050")
+        window.distance_box.setText("2,400")
+        window.description.setText("Benchmark swim")
+        timed("add_workout", window.add_workout)
+
+        window.table.setCurrentIndex(window.table_model.index(0, 0))
+        timed("delete_workout", window.delete_workout)
+
+    window.close()
+    print(json.dumps({name: summarize(samples) for name, samples in timings.items()}))
+
+
+def run_size(rows, repeat):
+    from generate_data import write_workouts
+
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    with tempfile.TemporaryDirectory() as tmp:
+        write_workouts(os.path.join(tmp, "fitness.db"), rows)
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", "--repeat", str(repeat)],
+            cwd=tmp, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(before_path, after_path):
+    with open(before_path) as handle:
+        before = json.load(handle)
+    with open(after_path) as handle:
+        after = json.load(handle)
+
+    print(f"{before.get('commit')} -> {after.get('commit')}")
+    regressions = 0
+    for size, operations in after["sizes"].items():
+        print(f"\n{int(size):,} rows")
+        for name, summary in operations.items():
+            old = before["sizes"].get(size, {}).get(name)
+            if old is None:
+                print(f"  {name:<20} {summary['median']:10.2f} ms  (new)")
+                continue
+            ratio = summary["median"] / old["median"] if old["median"] else float("inf")
+            flag = "  REGRESSION" if ratio > REGRESSION_RATIO else ""
+            regressions += bool(flag)
+            print(f"  {name:<20} {old['median']:10.2f} -> {summary['median']:10.2f} ms  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated row counts")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per operation")
+    parser.add_argument("--output", default="bench_results.json", help="where to write JSON results")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two result files")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.repeat)
+        return
+    if args.compare:
+        sys.exit(1 if compare(*args.compare) else 0)
+
+    results = {
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "sizes": {},
+    }
+    for rows in (int(size) for size in args.sizes.split(",")):
+        print(f"{rows:,} rows ...", flush=True)
+        results["sizes"][str(rows)] = operations = run_size(rows, args.repeat)
+        for name, summary in operations.items():
+            print(f"  {name:<20} {summary['median']:10.2f} ms median")
+
+    with open(args.output, "w") as handle:
+        json.dump(results, handle, indent=2)
+    print(f"\nresults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Check dark-mode switching stays within a latency budget on a large history
+
+Usage: QT_QPA_PLATFORM=offscreen python benchmarks/bench_theme.py [rows] [budget_ms] [toggles]
+
+Loads a generated history, scrolls the table to fetch several pages and
+shows the chart, then times toggle_dark until the window has repainted and
+the chart shows its image in the new theme. That is a render on a worker
+the first time each theme is shown, and a cached pixmap after that. Exits
+with status 1 if the median is over the budget.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PyQt5.QtCore import QModelIndex
+from PyQt5.QtWidgets import QApplication
+
+from bench_render import chart_drawn
+from generate_data import write_workouts
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    budget_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 150.0
+    toggles = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    tmp = tempfile.TemporaryDirectory()
+    os.chdir(tmp.name)
+    write_workouts("fitness.db", rows)
+
+    app = QApplication([])
+    import main as fittrack
+
+    window = fittrack.FitTrack()
+    window.show()
+    while len(window.cache) == 0:
+        app.processEvents()
+    for _ in range(10):
+        window.table_model.fetchMore(QModelIndex())
+    window.calculate_calories()
+    while not chart_drawn(window):
+        app.processEvents()
+    app.processEvents()
+
+    timings = []
+    for _ in range(toggles):
+        start = time.perf_counter()
+        window.toggle_dark()
+        app.processEvents()
+        while not chart_drawn(window):
+            app.processEvents()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    median = statistics.median(timings)
+    print(f"rows:        {rows:,} ({window.table_model.rowCount():,} in table)")
+    print(f"toggles:     {toggles}")
+    print(f"median:      {median:.1f} ms (budget {budget_ms:.0f} ms)")
+    print(f"max:         {max(timings):.1f} ms")
+
+    window.close()
+    os.chdir(ROOT)
+    sys.exit(0 if median <= budget_ms else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Measure GPX/TCX folder import, in-process against the process pool
+
+Usage: python benchmarks/bench_tracks.py [files] [points per file]
+
+Writes a folder of generated GPX and TCX tracks with known lengths, imports
+it once with a single process and once with the pool, and exits with
+status 1 unless both imports store the expected distances and samples.
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations import migrate
+from tracks import METERS_PER_YARD, import_tracks, track_files
+
+# Metres per degree of latitude for the haversine radius
+METERS_PER_DEGREE = 6_371_008.8 * 3.141592653589793 / 180
+
+
+def stamp(day, hour, second):
+    """UTC timestamp ``second`` seconds after ``hour``:00 on ``day``"""
+    moment = datetime.fromisoformat(day) + timedelta(hours=hour, seconds=second)
+    return moment.isoformat() + "Z"
+
+
+def write_gpx(path, points, step_m, day):
+    """An out-and-back run due north: ``points`` fixes ``step_m`` apart"""
+    step = step_m / METERS_PER_DEGREE
+    with open(path, "w") as handle:
+        handle.write('<?xml version="1.0"?>\n<gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1" '
+                     'xmlns:gpxtpx="http://www.garmin.com/xmlschemas/TrackPointExtension/v1">\n'
+                     f'<trk><name>Morning Run</name><type>running</type><trkseg>\n')
+        for i in range(points):
+            handle.write(f'<trkpt lat="{51.0 + i * step:.9f}" lon="-0.1"><ele>12.0</ele>'
+                         f'<time>{stamp(day, 6, i)}</time>'
+                         f'<extensions><gpxtpx:TrackPointExtension><gpxtpx:hr>{120 + i % 40}</gpxtpx:hr>'
+                         f'</gpxtpx:TrackPointExtension></extensions></trkpt>\n')
+        handle.write("</trkseg></trk>\n</gpx>\n")
+    return (points - 1) * step_m
+
+
+def write_tcx(path, points, step_m, day):
+    """A ride due east along the equator, split into two laps and tracks"""
+    step = step_m / METERS_PER_DEGREE
+    half = points // 2
+    ns = "http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2"
+    with open(path, "w") as handle:
+        handle.write(f'<?xml version="1.0"?>\n<TrainingCenterDatabase xmlns="{ns}">\n'
+                     f'<Activities><Activity Sport="Biking"><Id>{day}T07:00:00Z</Id>\n')
+        for lap, (first, last) in enumerate(((0, half), (half, points))):
+            handle.write(f'<Lap StartTime="{day}T07:00:00Z"><Calories>{250 + lap}</Calories><Track>\n')
+            for i in range(first, last):
+                handle.write(f'<Trackpoint><Time>{stamp(day, 7, i)}</Time>'
+                             f'<Position><LatitudeDegrees>0.0</LatitudeDegrees>'
+                             f'<LongitudeDegrees>{i * step:.9f}</LongitudeDegrees></Position>'
+                             f'<HeartRateBpm><Value>{130 + i % 30}</Value></HeartRateBpm></Trackpoint>\n')
+            handle.write("</Track></Lap>\n")
+        handle.write("</Activity></Activities>\n</TrainingCenterDatabase>\n")
+    # The gap between the two tracks is not part of the ride
+    return (points - 2) * step_m
+
+
+def timed_import(folder, db_path, workers):
+    migrate(db_path)
+    start = time.perf_counter()
+    imported, skipped = import_tracks(track_files(folder), db_path, workers=workers)
+    elapsed = time.perf_counter() - start
+    conn = sqlite3.connect(db_path)
+    stored = dict(conn.execute("SELECT date, distance FROM fitness").fetchall())
+    sampled = conn.execute("SELECT COUNT(*) FROM workout_samples").fetchone()[0]
+    conn.close()
+    return imported, skipped, elapsed, stored, sampled
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    points = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, "tracks")
+        os.makedirs(folder)
+        expected = {}
+        for i in range(files):
+            day = f"{2000 + i // 365}-{i // 28 % 12 + 1:02d}-{i % 28 + 1:02d}"
+            step_m = rng.uniform(2.0, 8.0)
+            write = write_gpx if i % 2 else write_tcx
+            meters = write(os.path.join(folder, f"track{i:05d}{'.gpx' if i % 2 else '.tcx'}"), points, step_m, day)
+            expected[day] = meters / METERS_PER_YARD
+        with open(os.path.join(folder, "broken.gpx"), "w") as handle:
+            handle.write("<gpx><trk><trkseg><trkpt lat=")
+        size = sum(os.path.getsize(path) for path in track_files(folder))
+
+        results = {}
+        for label, workers in (("1 process", 1), ("pool", None)):
+            results[label] = timed_import(folder, os.path.join(tmp, f"{workers}.db"), workers)
+
+    print(f"files:     {files:,} x {points:,} points, {size / 1e6:.0f} MB")
+    ok = True
+    for label, (imported, skipped, elapsed, stored, sampled) in results.items():
+        error = max(abs(stored.get(day, 0) - yards) / yards for day, yards in expected.items())
+        ok = ok and imported == files and skipped == 1 and error < 1e-4 and sampled == files
+        print(f"{label:<10} {elapsed:6.2f} s  {size / 1e6 / elapsed:6.1f} MB/s  "
+              f"imported {imported:,} ({sampled:,} with samples), skipped {skipped}, "
+              f"max distance error {error:.1e}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
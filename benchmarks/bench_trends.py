@@ -0,0 +1,52 @@
+"""Check the chart's trend fit stays within a latency budget
+
+Usage: python benchmarks/bench_trends.py [rows] [budget_ms] [runs]
+
+Reads a generated history into the workout cache and times
+trends.fit_trends on its chart points. Exits with status 1 if the median
+is over the budget.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from generate_data import write_workouts
+from migrations import migrate
+from trends import fit_trends
+from workout_cache import WorkoutCache
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    budget_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 50.0
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "fitness.db")
+        write_workouts(db_path, rows)
+        migrate(db_path)
+        cache = WorkoutCache()
+        cache.load(db_path)
+
+    distances, calories = cache.chart_points()
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        trends = fit_trends(distances, calories)
+        samples.append((time.perf_counter() - start) * 1000)
+    median = statistics.median(samples)
+
+    print(f"points:      {len(distances):,}")
+    print(f"fit:         slope {trends['slope']:.4f}, R² {trends['r2']:.3f}")
+    print(f"median:      {median:.1f} ms (budget {budget_ms:.0f} ms)")
+    print(f"max:         {max(samples):.1f} ms")
+    sys.exit(0 if median <= budget_ms else 1)
+
+
+if __name__ == "__main__":
+    main()
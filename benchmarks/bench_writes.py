@@ -0,0 +1,90 @@
+"""Measure workout insert throughput, one commit per insert against group commit
+
+Usage: python benchmarks/bench_writes.py [inserts] [directory]
+
+Inserts ``inserts`` workouts into a fresh database in ``directory`` (a temp
+directory by default; point it at the slow disk you care about) once with
+WorkoutRepository.add, a transaction and fsync each, and once through
+WorkoutWriter. Reports inserts/sec and how long the caller is blocked
+per insert, and exits with status 1 unless both runs store every row and
+group commit is the faster of the two.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from repository import WorkoutRepository
+from writer import WorkoutWriter
+
+
+def workouts(count):
+    for i in range(count):
+        yield f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}", 300.0 + i % 500, 1500.0 + i % 900, f"Front desk {i % 7}"
+
+
+def stored(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM fitness").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def single(db_path, count):
+    repository = WorkoutRepository(db_path)
+    calls = []
+    start = time.perf_counter()
+    for row in workouts(count):
+        before = time.perf_counter()
+        repository.add(*row)
+        calls.append(time.perf_counter() - before)
+    elapsed = time.perf_counter() - start
+    repository.close()
+    return elapsed, calls
+
+
+def grouped(db_path, count):
+    repository = WorkoutRepository(db_path)
+    writer = WorkoutWriter(db_path)
+    calls = []
+    start = time.perf_counter()
+    for key, row in enumerate(workouts(count)):
+        before = time.perf_counter()
+        writer.add(key, *row)
+        calls.append(time.perf_counter() - before)
+    writer.flush()
+    elapsed = time.perf_counter() - start
+    writer.close()
+    repository.close()
+    return elapsed, calls
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    directory = sys.argv[2] if len(sys.argv) > 2 else None
+
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        results = {}
+        for label, run in (("single", single), ("grouped", grouped)):
+            db_path = os.path.join(tmp, f"{label}.db")
+            elapsed, calls = run(db_path, count)
+            results[label] = (elapsed, calls, stored(db_path))
+
+    print(f"inserts:   {count:,} into {directory or 'a temp directory'}")
+    for label, (elapsed, calls, rows) in results.items():
+        print(f"{label:<9}  {count / elapsed:10,.0f} inserts/sec  "
+              f"caller blocked p50 {np.median(calls) * 1000:.3f} ms, max {max(calls) * 1000:.2f} ms  "
+              f"({rows:,} stored)")
+
+    ok = all(rows == count for _, _, rows in results.values())
+    sys.exit(0 if ok and results["grouped"][0] < results["single"][0] else 1)
+
+
+if __name__ == "__main__":
+    main()
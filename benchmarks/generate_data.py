@@ -0,0 +1,81 @@
+"""Fill a fitness database with synthetic workouts
+
+Usage: python benchmarks/generate_data.py <path> [rows]
+
+Rows are written to the original, unversioned schema so the app's
+migrations run on first open exactly as they would on a user's old
+database. A share of calories/distance values are stored as
+comma-formatted text ("1,050"), as older builds did.
+"""
+import os
+import sqlite3
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations import create_fitness_table
+
+
+# (description, typical distance in yards, calories per yard)
+ACTIVITIES = [
+    ("Morning lap swim", 2000, 0.25),
+    ("Open water swim", 2500, 0.28),
+    ("Easy run", 6000, 0.09),
+    ("Tempo run", 8000, 0.11),
+    ("Long ride", 40000, 0.03),
+    ("Indoor ride", 25000, 0.03),
+    ("Walk", 4000, 0.05),
+]
+
+FIRST_DATE = np.datetime64("2005-01-01")
+LAST_DATE = np.datetime64("2025-12-31")
+
+
+def _text_if_dirty(values, dirty):
+    # Comma-format the dirty entries; clean ones stay plain numbers
+    return [f"{value:,}" if flag else value for value, flag in zip(values.tolist(), dirty.tolist())]
+
+
+def write_workouts(path, rows, seed=42, dirty_fraction=0.05, chunk_size=200_000):
+    """Create ``path`` with ``rows`` workouts spread over twenty years"""
+    rng = np.random.default_rng(seed)
+    span = int((LAST_DATE - FIRST_DATE).astype(np.int64)) + 1
+    names = [name for name, _, _ in ACTIVITIES]
+    typical = np.array([yards for _, yards, _ in ACTIVITIES], dtype=np.float64)
+    burn = np.array([rate for _, _, rate in ACTIVITIES], dtype=np.float64)
+
+    conn = sqlite3.connect(path)
+    try:
+        create_fitness_table(conn)
+        for start in range(0, rows, chunk_size):
+            size = min(chunk_size, rows - start)
+            dates = (FIRST_DATE + rng.integers(0, span, size)).astype(str)
+            kinds = rng.integers(0, len(ACTIVITIES), size)
+            distance = np.maximum(typical[kinds] * rng.lognormal(0.0, 0.35, size), 100).astype(np.int64)
+            calories = (distance * burn[kinds] * rng.normal(1.0, 0.12, size) + 60).astype(np.int64)
+
+            conn.executemany(
+                "INSERT INTO fitness (date, calories, distance, description) VALUES (?, ?, ?, ?)",
+                zip(dates.tolist(),
+                    _text_if_dirty(calories, rng.random(size) < dirty_fraction),
+                    _text_if_dirty(distance, rng.random(size) < dirty_fraction),
+                    [names[kind] for kind in kinds.tolist()]),
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    path = sys.argv[1]
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    write_workouts(path, rows)
+    print(f"wrote {rows:,} workouts to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,570 @@
+# Imports
+import numpy as np
+from matplotlib.colors import LogNorm
+from matplotlib.dates import AutoDateLocator, ConciseDateFormatter
+from matplotlib.lines import Line2D
+from matplotlib.ticker import FuncFormatter, MultipleLocator
+
+from rollups import period_starts
+from samples import minmax_downsample
+from tracks import METERS_PER_YARD
+from training_load import ACUTE_DAYS, CHRONIC_DAYS
+
+
+# Chart colours per theme, keyed on dark_mode_enabled
+CHART_THEMES = {
+    False: {"background": "#ffffff", "text": "#2d3748", "grid": "#b0b0b0", "edge": "white",
+            "fit": "#e17055", "smooth": "#d63031"},
+    True: {"background": "#2d3748", "text": "#e2e8f0", "grid": "#a0aec0", "edge": "white",
+           "fit": "#fab1a0", "smooth": "#ff7675"},
+}
+
+
+def density_grid(x, y, extent, bins):
+    """Count points per cell of a ``bins`` (nx, ny) grid over ``extent``
+
+    Returns an (ny, nx) array ready for imshow with origin='lower'.
+    """
+    x0, x1, y0, y1 = extent
+    nx, ny = bins
+    ix = np.clip(((x - x0) * (nx / (x1 - x0))).astype(np.intp), 0, nx - 1)
+    iy = np.clip(((y - y0) * (ny / (y1 - y0))).astype(np.intp), 0, ny - 1)
+    counts = np.bincount(iy * nx + ix, minlength=nx * ny)
+    return counts.reshape(ny, nx)
+
+
+def band_vertices(x, low, high):
+    """Outline of the area between two curves, for PolyCollection.set_verts"""
+    return [np.column_stack((np.concatenate((x, x[::-1])), np.concatenate((low, high[::-1]))))]
+
+
+def padded_limits(values, fraction=0.05):
+    """Axis limits around ``values`` with a small margin, like autoscale"""
+    low, high = float(values.min()), float(values.max())
+    pad = (high - low) * fraction or abs(high) * fraction or 1.0
+    return low - pad, high + pad
+
+
+def prepare_chart(distances, calories, density_threshold, bins):
+    """Compute everything the chart needs to show a set of points
+
+    Pure NumPy, so it can run on a worker thread; the result is handed to
+    PerformanceChart.show on the GUI thread.
+    """
+    xlim = padded_limits(distances)
+    ylim = padded_limits(calories)
+    prepared = {"xlim": xlim, "ylim": ylim, "density": len(distances) > density_threshold}
+
+    if prepared["density"]:
+        prepared["extent"] = xlim + ylim
+        prepared["counts"] = density_grid(distances, calories, prepared["extent"], bins)
+        return prepared
+
+    min_calorie = calories.min()
+    max_calorie = calories.max()
+    if max_calorie > min_calorie:
+        normalized_calories = (calories - min_calorie) / (max_calorie - min_calorie)
+    else:
+        normalized_calories = np.full(len(calories), 0.5)
+
+    prepared["offsets"] = np.column_stack((distances, calories))
+    prepared["colors"] = normalized_calories
+    return prepared
+
+
+class PerformanceChart:
+    """Distance vs. calories scatter drawn on a matplotlib Figure
+
+    The axes, scatter and colorbar are created on the first update and then
+    changed in place, so redraws and theme switches never rebuild the figure.
+    Above ``density_threshold`` points the scatter is swapped for a binned
+    density image whose cost does not grow with the number of workouts.
+    A prepared dict carrying "trends" (trends.fit_trends) also shows the
+    least-squares line, the smoothed curve and their confidence bands.
+    """
+
+    DENSITY_THRESHOLD = 20_000
+    DENSITY_BINS = (160, 100)
+
+    def __init__(self, figure, dark=False, density_threshold=None):
+        self.figure = figure
+        self.dark = dark
+        self.density_threshold = density_threshold or self.DENSITY_THRESHOLD
+        self.ax = None
+        self.scatter = None
+        self.image = None
+        self.colorbar = None
+        self.fit_line = None
+        self.fit_band = None
+        self.smooth_line = None
+        self.smooth_band = None
+        self.legend = None
+        self.visible = False
+        self.density = False
+
+    def build(self):
+        """Create the persistent artists"""
+        ax = self.figure.add_subplot(111)
+        self.scatter = ax.scatter(
+            np.empty(0),
+            np.empty(0),
+            c=np.empty(0),
+            cmap='viridis',
+            vmin=0,
+            vmax=1,
+            s=100,
+            alpha=0.7,
+            edgecolors='white',
+            linewidth=1.5
+        )
+        self.image = ax.imshow(
+            np.ma.masked_equal(np.zeros((1, 1)), 0),
+            cmap='viridis',
+            norm=LogNorm(vmin=1, vmax=10),
+            origin='lower',
+            aspect='auto',
+            interpolation='nearest',
+            visible=False
+        )
+
+        ax.set_title("Distance vs. Calories Burned",
+                     fontsize=14,
+                     fontweight='bold',
+                     pad=20)
+        ax.set_xlabel("Distance (yards)", fontsize=11)
+        ax.set_ylabel("Calories Burned", fontsize=11)
+
+        self.colorbar = self.figure.colorbar(self.scatter, ax=ax)
+        self.colorbar.set_label("Normalized Calories")
+
+        # Trend overlay, hidden until a prepared dict carries trends
+        self.fit_band = ax.fill_between([0, 1], [0, 0], [0, 0], alpha=0.2, linewidth=0, visible=False)
+        self.smooth_band = ax.fill_between([0, 1], [0, 0], [0, 0], alpha=0.2, linewidth=0, visible=False)
+        self.fit_line, = ax.plot([], [], linestyle="--", linewidth=2, label="Least squares", visible=False)
+        self.smooth_line, = ax.plot([], [], linewidth=2.5, label="Smoothed", visible=False)
+
+        ax.grid(True, alpha=0.2)
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+
+        self.ax = ax
+        self.apply_theme(self.dark)
+        self.figure.tight_layout()
+
+    def prepare(self, distances, calories):
+        """prepare_chart with this chart's density settings"""
+        return prepare_chart(distances, calories, self.density_threshold, self.DENSITY_BINS)
+
+    def update(self, distances, calories):
+        """Show new points, as a scatter or as a density image for large sets"""
+        self.show(self.prepare(distances, calories))
+
+    def show(self, prepared):
+        """Apply the output of prepare_chart to the existing artists"""
+        if self.ax is None:
+            self.build()
+
+        if prepared["density"]:
+            counts = prepared["counts"]
+            self.image.set_data(np.ma.masked_equal(counts, 0))
+            self.image.set_extent(prepared["extent"])
+            self.image.norm.vmax = max(int(counts.max()), 2)
+            self.scatter.set_offsets(np.empty((0, 2)))
+        else:
+            self.scatter.set_offsets(prepared["offsets"])
+            self.scatter.set_array(prepared["colors"])
+        self.set_mode(prepared["density"])
+        self.set_trends(prepared.get("trends"))
+
+        self.ax.set_xlim(*prepared["xlim"])
+        self.ax.set_ylim(*prepared["ylim"])
+        self.set_visible(True)
+
+    def set_trends(self, trends):
+        """Show a trends.fit_trends result over the points, or hide the overlay for None"""
+        if self.ax is None:
+            return
+        shown = trends is not None
+        if shown:
+            grid = trends["grid"]
+            self.fit_line.set_data(grid, trends["linear"])
+            self.fit_band.set_verts(band_vertices(grid, trends["linear_low"], trends["linear_high"]))
+            self.smooth_line.set_data(grid, trends["smooth"])
+            self.smooth_band.set_verts(band_vertices(grid, trends["smooth_low"], trends["smooth_high"]))
+            self.fit_line.set_label(f"Least squares (R² {trends['r2']:.2f})")
+            self.legend.texts[0].set_text(self.fit_line.get_label())
+        for artist in (self.fit_line, self.fit_band, self.smooth_line, self.smooth_band, self.legend):
+            artist.set_visible(shown)
+
+    def set_mode(self, density):
+        """Switch the colorbar and visible artist between scatter and density"""
+        if density == self.density:
+            return
+        self.density = density
+        self.scatter.set_visible(not density)
+        self.image.set_visible(density)
+        self.colorbar.update_normal(self.image if density else self.scatter)
+        self.colorbar.set_label("Workouts per Cell" if density else "Normalized Calories",
+                                color=CHART_THEMES[self.dark]["text"])
+
+    def apply_theme(self, dark):
+        """Restyle the existing artists for light or dark mode"""
+        self.dark = dark
+        if self.ax is None:
+            return
+
+        theme = CHART_THEMES[dark]
+        self.figure.patch.set_facecolor(theme["background"])
+        self.ax.set_facecolor(theme["background"])
+        for text in (self.ax.title, self.ax.xaxis.label, self.ax.yaxis.label,
+                     self.colorbar.ax.yaxis.label):
+            text.set_color(theme["text"])
+        self.ax.tick_params(colors=theme["text"])
+        self.colorbar.ax.tick_params(colors=theme["text"])
+        for spine in self.ax.spines.values():
+            spine.set_edgecolor(theme["text"])
+        self.colorbar.outline.set_edgecolor(theme["text"])
+        self.ax.grid(True, alpha=0.2, color=theme["grid"])
+        self.scatter.set_edgecolor(theme["edge"])
+
+        for line, band, color in ((self.fit_line, self.fit_band, theme["fit"]),
+                                  (self.smooth_line, self.smooth_band, theme["smooth"])):
+            line.set_color(color)
+            band.set_facecolor(color)
+
+        # Legend handles are copies of the lines, so the legend is remade per theme
+        shown = self.legend is not None and self.legend.get_visible()
+        handles = [Line2D([], [], color=line.get_color(), linestyle=line.get_linestyle(),
+                          linewidth=line.get_linewidth(), label=line.get_label())
+                   for line in (self.fit_line, self.smooth_line)]
+        self.legend = self.ax.legend(handles=handles, loc="upper left",
+                                     fontsize=9, framealpha=0.6, facecolor=theme["background"],
+                                     edgecolor=theme["grid"], labelcolor=theme["text"])
+        self.legend.set_visible(shown)
+
+    def set_visible(self, visible):
+        """Show or blank the chart without discarding its artists"""
+        self.visible = visible
+        if self.ax is not None:
+            self.ax.set_visible(visible)
+            self.colorbar.ax.set_visible(visible)
+
+
+class PeriodChart:
+    """Calories (filled steps) and distance (line) totals per week, month or year
+
+    Its artists are built once and updated in place. It lays out its own
+    figure on every show, so give it a figure of its own (ChartRenderer does).
+    """
+
+    TITLES = {"week": "Weekly Totals", "month": "Monthly Totals", "year": "Yearly Totals"}
+    CALORIES_COLOR = "#00c896"
+    DISTANCE_COLOR = "#6c5ce7"
+
+    def __init__(self, figure, dark=False):
+        self.figure = figure
+        self.dark = dark
+        self.ax = None
+        self.twin = None
+        self.steps = None
+        self.line = None
+        self.visible = False
+
+    def build(self):
+        """Create the persistent artists"""
+        ax = self.figure.add_subplot(111)
+        twin = ax.twinx()
+
+        self.steps = ax.stairs([0.0], [0.0, 1.0], fill=True, alpha=0.7,
+                               color=self.CALORIES_COLOR, label="Calories")
+        self.line, = twin.plot([], [], color=self.DISTANCE_COLOR, linewidth=2,
+                               marker="o", markersize=3, label="Distance")
+
+        locator = AutoDateLocator()
+        ax.xaxis.set_major_locator(locator)
+        ax.xaxis.set_major_formatter(ConciseDateFormatter(locator))
+        ax.set_ylabel("Calories Burned", fontsize=11)
+        twin.set_ylabel("Distance (yards)", fontsize=11)
+        for axes in (ax, twin):
+            axes.yaxis.set_major_formatter(FuncFormatter(lambda value, _: f"{value:,.0f}"))
+            axes.spines['top'].set_visible(False)
+        ax.grid(True, alpha=0.2)
+
+        self.ax = ax
+        self.twin = twin
+        self.apply_theme(self.dark)
+
+    def show(self, totals, period):
+        """Show per-period totals from rollups.read_rollup or bucket_totals"""
+        if self.ax is None:
+            self.build()
+
+        periods = totals["periods"]
+        if len(periods):
+            edges = period_starts(np.append(periods, periods[-1] + (7 if period == "week" else 1)), period)
+            edges = edges.astype(np.int64).astype(np.float64)
+            calories = totals["calories"]
+            distance = totals["distance"]
+        else:
+            edges = np.array([0.0, 1.0])
+            calories = distance = np.zeros(1)
+
+        self.steps.set_data(calories, edges)
+        self.line.set_data((edges[:-1] + edges[1:]) / 2, distance)
+        self.ax.set_xlim(edges[0], edges[-1])
+        self.ax.set_ylim(0, float(calories.max()) * 1.1 or 1.0)
+        self.twin.set_ylim(0, float(distance.max()) * 1.1 or 1.0)
+        self.ax.set_title(self.TITLES[period], fontsize=14, fontweight='bold', pad=20,
+                          color=CHART_THEMES[self.dark]["text"])
+        self.set_visible(True)
+
+        # Tick label widths follow the totals; a few hundred periods lay out quickly
+        self.figure.tight_layout()
+
+    def apply_theme(self, dark):
+        """Restyle the existing artists for light or dark mode"""
+        self.dark = dark
+        if self.ax is None:
+            return
+
+        theme = CHART_THEMES[dark]
+        self.figure.patch.set_facecolor(theme["background"])
+        self.ax.set_facecolor(theme["background"])
+        for axes in (self.ax, self.twin):
+            for text in (axes.title, axes.xaxis.label, axes.yaxis.label):
+                text.set_color(theme["text"])
+            axes.tick_params(colors=theme["text"])
+            for spine in axes.spines.values():
+                spine.set_edgecolor(theme["text"])
+        self.ax.grid(True, alpha=0.2, color=theme["grid"])
+
+    def set_visible(self, visible):
+        """Show or blank the chart without discarding its artists"""
+        self.visible = visible
+        if self.ax is not None:
+            self.ax.set_visible(visible)
+            self.twin.set_visible(visible)
+
+
+class LoadChart:
+    """Rolling 7-day and 28-day calories and distance, with acute:chronic ratios
+
+    Totals are drawn on the upper axes (chronic as its weekly average, so
+    the two lines are comparable) and the ratios below, over the usual
+    0.8-1.3 band. Built once, on a figure of its own.
+    """
+
+    CALORIES_COLOR = PeriodChart.CALORIES_COLOR
+    DISTANCE_COLOR = PeriodChart.DISTANCE_COLOR
+    TARGET_RATIO = (0.8, 1.3)
+
+    def __init__(self, figure, dark=False):
+        self.figure = figure
+        self.dark = dark
+        self.ax = None
+        self.twin = None
+        self.ratio_ax = None
+        self.lines = {}
+        self.band = None
+        self.visible = False
+
+    def build(self):
+        """Create the persistent artists"""
+        grid = self.figure.add_gridspec(3, 1)
+        ax = self.figure.add_subplot(grid[:2, 0])
+        twin = ax.twinx()
+        ratio_ax = self.figure.add_subplot(grid[2, 0], sharex=ax)
+
+        for axes, name, color in ((ax, "calories", self.CALORIES_COLOR), (twin, "distance", self.DISTANCE_COLOR)):
+            self.lines[f"acute {name}"], = axes.plot([], [], color=color, linewidth=1.5,
+                                                      label=f"{ACUTE_DAYS}-day {name}")
+            self.lines[f"chronic {name}"], = axes.plot([], [], color=color, linewidth=1.5, linestyle="--",
+                                                        label=f"{CHRONIC_DAYS}-day {name} (weekly avg)")
+            self.lines[f"ratio {name}"], = ratio_ax.plot([], [], color=color, linewidth=1.5)
+        self.band = ratio_ax.axhspan(*self.TARGET_RATIO, alpha=0.15, color=self.CALORIES_COLOR, linewidth=0)
+
+        locator = AutoDateLocator()
+        ratio_ax.xaxis.set_major_locator(locator)
+        ratio_ax.xaxis.set_major_formatter(ConciseDateFormatter(locator))
+        ax.tick_params(labelbottom=False)
+        ax.set_ylabel("Calories", fontsize=11)
+        twin.set_ylabel("Distance (yards)", fontsize=11)
+        ratio_ax.set_ylabel("Acute:Chronic", fontsize=11)
+        for axes in (ax, twin):
+            axes.yaxis.set_major_formatter(FuncFormatter(lambda value, _: f"{value:,.0f}"))
+        for axes in (ax, twin, ratio_ax):
+            axes.spines['top'].set_visible(False)
+        ax.grid(True, alpha=0.2)
+        ratio_ax.grid(True, alpha=0.2)
+
+        self.ax = ax
+        self.twin = twin
+        self.ratio_ax = ratio_ax
+        self.apply_theme(self.dark)
+
+    def show(self, series):
+        """Show training_load.load_series output"""
+        if self.ax is None:
+            self.build()
+
+        days = series["days"].astype(np.float64)
+        for index, name in enumerate(("calories", "distance")):
+            self.lines[f"acute {name}"].set_data(days, series["acute"][index])
+            self.lines[f"chronic {name}"].set_data(days, series["chronic"][index] * ACUTE_DAYS / CHRONIC_DAYS)
+            self.lines[f"ratio {name}"].set_data(days, series["ratio"][index])
+
+        if len(days):
+            self.ax.set_xlim(days[0], days[-1] + 1)
+        self.ax.set_ylim(0, float(series["acute"][0].max(initial=0)) * 1.1 or 1.0)
+        self.twin.set_ylim(0, float(series["acute"][1].max(initial=0)) * 1.1 or 1.0)
+        ratios = series["ratio"][np.isfinite(series["ratio"])]
+        self.ratio_ax.set_ylim(0, max(float(np.percentile(ratios, 99)) if len(ratios) else 0, 2.0) * 1.1)
+        self.ax.set_title("Training Load", fontsize=14, fontweight='bold', pad=20,
+                          color=CHART_THEMES[self.dark]["text"])
+        self.set_visible(True)
+        self.figure.tight_layout()
+
+    def apply_theme(self, dark):
+        """Restyle the existing artists for light or dark mode"""
+        self.dark = dark
+        if self.ax is None:
+            return
+
+        theme = CHART_THEMES[dark]
+        self.figure.patch.set_facecolor(theme["background"])
+        for axes in (self.ax, self.ratio_ax):
+            axes.set_facecolor(theme["background"])
+            axes.grid(True, alpha=0.2, color=theme["grid"])
+        for axes in (self.ax, self.twin, self.ratio_ax):
+            for text in (axes.title, axes.xaxis.label, axes.yaxis.label):
+                text.set_color(theme["text"])
+            axes.tick_params(colors=theme["text"])
+            for spine in axes.spines.values():
+                spine.set_edgecolor(theme["text"])
+
+        # Legend text follows the theme, so the legend is remade with it
+        handles = [self.lines[f"{kind} {name}"] for name in ("calories", "distance") for kind in ("acute", "chronic")]
+        self.ax.legend(handles=handles, loc="lower left", fontsize=8, ncol=2, framealpha=0.6,
+                       facecolor=theme["background"], edgecolor=theme["grid"], labelcolor=theme["text"])
+
+    def set_visible(self, visible):
+        """Show or blank the chart without discarding its artists"""
+        self.visible = visible
+        if self.ax is not None:
+            self.ax.set_visible(visible)
+            self.twin.set_visible(visible)
+            self.ratio_ax.set_visible(visible)
+
+
+def format_elapsed(seconds, _=None):
+    """Tick label for seconds into a workout: 0:45, 1:05:00"""
+    seconds = int(round(seconds))
+    hours, minutes = divmod(seconds // 60, 60)
+    return f"{hours}:{minutes:02d}:{seconds % 60:02d}" if hours else f"{minutes}:{seconds % 60:02d}"
+
+
+class DetailChart:
+    """Heart rate and speed through one workout, from samples.detail_samples
+
+    Only the points minmax_downsample keeps for the canvas width are drawn,
+    so a multi-hour 1 Hz session plots as quickly as a short one; resample
+    picks them again when the canvas is resized. Lives on its own figure
+    in the workout detail window and is built once.
+    """
+
+    HEART_RATE_COLOR = "#d63031"
+    SPEED_COLOR = PeriodChart.DISTANCE_COLOR
+    # Steady efforts are not zoomed into sensor noise
+    MIN_HALF_SPAN = 5.0
+    # Elapsed-time tick spacings, in seconds
+    TICK_STEPS = (10, 30, 60, 300, 600, 900, 1800, 3600, 7200, 14400)
+
+    def __init__(self, figure, dark=False):
+        self.figure = figure
+        self.dark = dark
+        self.ax = None
+        self.speed_ax = None
+        self.lines = {}
+        self.samples = None
+
+    def build(self):
+        """Create the persistent artists"""
+        ax = self.figure.add_subplot(211)
+        speed_ax = self.figure.add_subplot(212, sharex=ax)
+        self.lines["heart_rate"], = ax.plot([], [], color=self.HEART_RATE_COLOR, linewidth=1)
+        self.lines["speed"], = speed_ax.plot([], [], color=self.SPEED_COLOR, linewidth=1)
+
+        ax.tick_params(labelbottom=False)
+        ax.set_ylabel("Heart rate (bpm)", fontsize=11)
+        speed_ax.set_ylabel("Speed (yd/min)", fontsize=11)
+        speed_ax.set_xlabel("Elapsed", fontsize=11)
+        speed_ax.xaxis.set_major_formatter(FuncFormatter(format_elapsed))
+        for axes in (ax, speed_ax):
+            axes.yaxis.set_major_formatter(FuncFormatter(lambda value, _: f"{value:,.0f}"))
+            axes.spines['top'].set_visible(False)
+            axes.spines['right'].set_visible(False)
+
+        self.ax = ax
+        self.speed_ax = speed_ax
+        self.apply_theme(self.dark)
+
+    def show(self, samples, title):
+        """Show detail_samples output under ``title``"""
+        if self.ax is None:
+            self.build()
+
+        self.samples = samples
+        self._set_lines(samples["shown"])
+        duration = float(samples["elapsed"][-1]) or 1.0
+        self.ax.set_xlim(0, duration)
+        step = next((step for step in self.TICK_STEPS if duration / step <= 8), self.TICK_STEPS[-1])
+        self.speed_ax.xaxis.set_major_locator(MultipleLocator(step))
+        for name, axes in (("heart_rate", self.ax), ("speed", self.speed_ax)):
+            values = self._values(name)
+            values = values[np.isfinite(values)] if values is not None else values
+            if values is not None and len(values):
+                low, high = padded_limits(values)
+                middle, half = (low + high) / 2, max((high - low) / 2, self.MIN_HALF_SPAN)
+                axes.set_ylim(middle - half, middle + half)
+        self.ax.set_title(title, fontsize=14, fontweight='bold', pad=20, color=CHART_THEMES[self.dark]["text"])
+        self.figure.tight_layout()
+
+    def resample(self, width):
+        """Pick the drawn points again for a canvas ``width`` pixels wide"""
+        if self.samples is None:
+            return
+        elapsed = self.samples["elapsed"]
+        self._set_lines({name: minmax_downsample(elapsed, self.samples[name], width)
+                         for name in self.lines if name in self.samples})
+
+    def _values(self, name):
+        # Speed is stored in m/s and shown in yards per minute
+        values = self.samples.get(name)
+        if values is not None and name == "speed":
+            values = values * 60 / METERS_PER_YARD
+        return values
+
+    def _set_lines(self, shown):
+        elapsed = self.samples["elapsed"]
+        for name, line in self.lines.items():
+            if name in shown:
+                line.set_data(elapsed[shown[name]], self._values(name)[shown[name]])
+            else:
+                line.set_data([], [])
+
+    def apply_theme(self, dark):
+        """Restyle the existing artists for light or dark mode"""
+        self.dark = dark
+        if self.ax is None:
+            return
+
+        theme = CHART_THEMES[dark]
+        self.figure.patch.set_facecolor(theme["background"])
+        for axes in (self.ax, self.speed_ax):
+            axes.set_facecolor(theme["background"])
+            axes.grid(True, alpha=0.2, color=theme["grid"])
+            for text in (axes.title, axes.xaxis.label, axes.yaxis.label):
+                text.set_color(theme["text"])
+            axes.tick_params(colors=theme["text"])
+            for spine in axes.spines.values():
+                spine.set_edgecolor(theme["text"])
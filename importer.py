@@ -0,0 +1,190 @@
+# Imports
+import csv
+import os
+import sqlite3
+from datetime import date as Date, datetime
+from itertools import islice
+
+import numpy as np
+
+from repository import catch_up_search
+from rollups import catch_up_rollups, defer_rollups
+from samples import store_samples
+from workout_cache import MISSING_DAY
+
+
+# Header names used by common watch/app exports, matched case-insensitively
+COLUMN_ALIASES = {
+    "date": ("date", "start time", "start", "workout date", "activity date", "day"),
+    "calories": ("calories", "calories burned", "active calories", "kcal", "energy (kcal)"),
+    "distance": ("distance", "distance (yds)", "distance (yards)", "yards"),
+    "description": ("description", "activity type", "activity", "title", "name", "type", "notes"),
+}
+
+DATE_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%m/%d/%Y", "%d.%m.%Y")
+
+INSERT_SQL = "INSERT INTO fitness (date, calories, distance, description, day) VALUES (?, ?, ?, ?, ?)"
+
+# Ordinal of 1970-01-01, so day numbers match migrations.DAY_EXPR
+EPOCH_ORDINAL = Date(1970, 1, 1).toordinal()
+
+
+def parse_date(text):
+    """Return an export date/timestamp as yyyy-MM-dd, or None"""
+    text = text.strip()
+    # ISO dates and timestamps ("2025-11-04", "2025-11-04T06:30:00Z") need no parsing
+    if len(text) >= 10 and text[4] == "-" and text[7] == "-" and text[:4].isdigit():
+        return text[:10]
+
+    day = text.split(" ")[0].split("T")[0]
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(day, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+def day_of(date, days):
+    """Day number for a yyyy-MM-dd date, memoized in ``days``; None if invalid"""
+    day = days.get(date, False)
+    if day is False:
+        try:
+            day = Date.fromisoformat(date).toordinal() - EPOCH_ORDINAL
+        except ValueError:
+            day = None
+        days[date] = day
+    return day
+
+
+def parse_number(text):
+    """Return an export number ("1,050", " 300 ") as a float, or None"""
+    try:
+        return float(text.replace(",", "").strip())
+    except (ValueError, AttributeError):
+        return None
+
+
+def map_columns(header):
+    """Find the position of each fitness column in a CSV header row"""
+    names = [name.strip().lower() for name in header]
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in names:
+                columns[field] = names.index(alias)
+                break
+
+    missing = [field for field in ("date", "calories", "distance") if field not in columns]
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(missing)}")
+    return columns
+
+
+def open_bulk_connection(db_path):
+    """Open a connection tuned for large write transactions"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-65536")
+    return conn
+
+
+def _count_lines(handle, consumed):
+    # Decode line by line so progress can be reported in bytes read
+    for raw in handle:
+        consumed[0] += len(raw)
+        yield raw.decode("utf-8-sig")
+
+
+def _rollup_columns(rows):
+    # Day, calories and distance arrays of a parsed chunk for catch_up_rollups
+    days = np.array([MISSING_DAY if row[4] is None else row[4] for row in rows], dtype=np.int64)
+    calories = np.nan_to_num(np.array([row[1] for row in rows], dtype=np.float64))
+    distance = np.nan_to_num(np.array([row[2] for row in rows], dtype=np.float64))
+    return days, calories, distance
+
+
+def insert_rows(conn, rows, samples=None):
+    """Insert parsed (date, calories, distance, description, day) rows in one transaction
+
+    The per-row rollup and search triggers are deferred; the rows are folded
+    into the rollups in one grouped pass and into the search index with one
+    INSERT ... SELECT. Calories or distance may be None (stored as NULL).
+    ``samples`` optionally holds each row's samples.pack_samples output or None.
+    """
+    # With nothing inserted last_insert_rowid() is stale (0 on a fresh
+    # connection), which would reindex the whole table for search
+    if not rows:
+        return
+    with conn:
+        defer_rollups(conn)
+        conn.executemany(INSERT_SQL, rows)
+        # The write lock is held, so the rows got consecutive ids ending at
+        # the last one; MAX(id) + 1 is wrong once the newest rows were deleted
+        first_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0] - len(rows) + 1
+        if samples:
+            store_samples(conn, first_id, samples)
+        catch_up_search(conn, first_id)
+        catch_up_rollups(conn, *_rollup_columns(rows))
+
+
+def import_csv(path, db_path, chunk_size=100_000, progress=None):
+    """Stream a CSV export into the fitness table
+
+    Rows are parsed ``chunk_size`` at a time and each chunk is written by
+    insert_rows in its own transaction.
+    ``progress(done, total)`` is called with bytes read after every chunk.
+    Returns ``(imported, skipped)``.
+    """
+    total = os.path.getsize(path)
+    consumed = [0]
+    imported = skipped = 0
+    days = {}
+
+    conn = open_bulk_connection(db_path)
+    try:
+        with open(path, "rb") as handle:
+            reader = csv.reader(_count_lines(handle, consumed))
+            header = next(reader, None)
+            if header is None:
+                return 0, 0
+            columns = map_columns(header)
+            date_col = columns["date"]
+            cal_col = columns["calories"]
+            dist_col = columns["distance"]
+            desc_col = columns.get("description")
+            width = max(columns.values()) + 1
+
+            while True:
+                chunk = list(islice(reader, chunk_size))
+                if not chunk:
+                    break
+
+                rows = []
+                for record in chunk:
+                    if len(record) < width:
+                        skipped += 1
+                        continue
+                    date = parse_date(record[date_col])
+                    calories = parse_number(record[cal_col])
+                    distance = parse_number(record[dist_col])
+                    # ISO-shaped dates are not checked by parse_date; a day
+                    # such as 2024-02-30 would roll over in the day trigger
+                    # but be left out of the rollups
+                    day = None if date is None else day_of(date, days)
+                    if day is None or calories is None or distance is None:
+                        skipped += 1
+                        continue
+                    description = record[desc_col].strip() if desc_col is not None else ""
+                    rows.append((date, calories, distance, description, day))
+
+                insert_rows(conn, rows)
+                imported += len(rows)
+
+                if progress:
+                    progress(consumed[0], total)
+    finally:
+        conn.close()
+
+    return imported, skipped
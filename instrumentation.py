@@ -0,0 +1,155 @@
+# Imports
+import atexit
+import bisect
+import csv
+import inspect
+import json
+import os
+import threading
+import time
+
+
+# Upper bounds of the latency buckets in milliseconds; the last bucket is open
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Set to a .json or .csv path to record latencies for a session
+ENV_VAR = "FITTRACK_PROFILE"
+
+_recorder = None
+
+
+class Histogram:
+    """Latency distribution of one operation"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.min = min(self.min, ms)
+        self.max = max(self.max, ms)
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of calls"""
+        target = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS + (self.max,), self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3),
+            "min_ms": round(self.min, 3),
+            "p50_ms": round(self.percentile(0.5), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "max_ms": round(self.max, 3),
+            "buckets": {f"<={bound}" if i < len(BUCKETS_MS) else f">{BUCKETS_MS[-1]}": count
+                        for i, (bound, count) in enumerate(zip(BUCKETS_MS + (None,), self.counts))},
+        }
+
+
+class Recorder:
+    """Per-operation histograms, safe to update from worker threads"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.histograms = {}
+
+    def record(self, name, seconds):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds * 1000)
+
+    def summaries(self):
+        with self.lock:
+            return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def dump(self):
+        """Write the histograms to self.path as JSON, or CSV for a .csv path"""
+        summaries = self.summaries()
+        if self.path.lower().endswith(".csv"):
+            fields = ["operation", "count", "total_ms", "mean_ms", "min_ms", "p50_ms", "p95_ms", "max_ms"]
+            bucket_names = list(next(iter(summaries.values()))["buckets"]) if summaries else []
+            with open(self.path, "w", newline="") as handle:
+                writer = csv.writer(handle)
+                writer.writerow(fields + bucket_names)
+                for name, summary in summaries.items():
+                    writer.writerow([name] + [summary[field] for field in fields[1:]]
+                                    + [summary["buckets"][bucket] for bucket in bucket_names])
+        else:
+            with open(self.path, "w") as handle:
+                json.dump(summaries, handle, indent=2)
+
+
+def enable(path):
+    """Start recording; histograms are written to ``path`` at exit"""
+    global _recorder
+    if _recorder is None:
+        _recorder = Recorder(path)
+        atexit.register(_recorder.dump)
+    return _recorder
+
+
+def enable_from_environment():
+    path = os.environ.get(ENV_VAR)
+    if path:
+        enable(path)
+
+
+def enabled():
+    return _recorder is not None
+
+
+def record(name, seconds):
+    if _recorder is not None:
+        _recorder.record(name, seconds)
+
+
+def timed(name, fn):
+    """``fn`` wrapped to record its wall time as ``name``; ``fn`` itself when disabled
+
+    The wrapper passes on only as many positional arguments as ``fn`` takes,
+    so it can stand in for a slot that ignores the signal's arguments.
+    """
+    if _recorder is None:
+        return fn
+
+    params = inspect.signature(fn).parameters.values()
+    if any(param.kind == param.VAR_POSITIONAL for param in params):
+        accepts = None
+    else:
+        accepts = sum(param.kind in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD) for param in params)
+
+    def wrapper(*args):
+        start = time.perf_counter()
+        try:
+            return fn(*args[:accepts])
+        finally:
+            _recorder.record(name, time.perf_counter() - start)
+
+    return wrapper
+
+
+def call(name, fn, *args, **kwargs):
+    """Call ``fn``, recording its wall time as ``name`` when enabled"""
+    if _recorder is None:
+        return fn(*args, **kwargs)
+    start = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _recorder.record(name, time.perf_counter() - start)
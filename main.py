@@ -1,27 +1,579 @@
 # Imports
-from PyQt5.QtCore import Qt, QDate, QPropertyAnimation, QEasingCurve, QTimer
+from PyQt5.QtCore import (Qt, QDate, QPropertyAnimation, QEasingCurve, QTimer,
+                          QAbstractTableModel, QModelIndex, QRegularExpression)
 from PyQt5.QtWidgets import (QApplication, QWidget, QLabel, QPushButton, QVBoxLayout, 
-                             QHBoxLayout, QMessageBox, QTableWidget, QTableWidgetItem, 
-                             QHeaderView, QDateEdit, QLineEdit, QFrame, QScrollArea)
-from PyQt5.QtSql import QSqlDatabase, QSqlQuery
-from PyQt5.QtGui import QFont, QPalette, QColor, QIcon
-
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+                             QHBoxLayout, QMessageBox, QTableView, QAbstractItemView,
+                             QHeaderView, QDateEdit, QLineEdit, QFrame, QScrollArea,
+                             QFileDialog, QProgressDialog, QComboBox, QCheckBox, QDialog)
+from PyQt5.QtGui import QFont, QPalette, QColor, QIcon, QPixmap, QRegularExpressionValidator
 
 import numpy as np
+import argparse
+import sqlite3
 from sys import exit
 
+import instrumentation
+from refresh import RefreshScheduler
+from repository import WorkoutRepository, parse_amount, search_ids, search_terms
+from rollups import bucket_totals, read_rollup
+from samples import detail_samples
+from tracks import import_files, import_folder
+from training_load import TrainingLoad, load_series, load_summary
+from trends import fit_trends
+from workers import TaskRunner
+from writer import WorkoutWriter
+from workout_cache import MISSING_DAY, WorkoutCache, day_number, read_columns, valid_points
+
+
+DB_PATH = "fitness.db"
+
+# Pause in typing before the history search runs
+SEARCH_DELAY_MS = 200
+
+# Detail plot width, in pixels, before its window has been shown
+DETAIL_WIDTH = 900
+
+# Workouts the writer has not saved yet have ids from here up, which sort as
+# the newest of their day like the database id they will get
+PENDING_ID = 1 << 31
+
+# Calories/distance entries: plain or comma-grouped, with optional decimals
+AMOUNT_PATTERN = r"\d+(\.\d*)?|\d{1,3}(,\d{3})+(\.\d*)?"
+
+
+# Window stylesheets, keyed on dark_mode_enabled; Qt parses whichever is applied
+THEME_STYLESHEETS = {
+    False: """
+        QWidget {
+            background-color: #f8fafb;
+            color: #1a2332;
+            font-family: 'Quicksand', 'Segoe UI', Arial, sans-serif;
+        }
+        
+        QScrollArea {
+            border: none;
+        }
+        
+        #header {
+            background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                        stop:0 #00c896, stop:1 #00a67d);
+            border: none;
+        }
+        
+        #logoText, #statValue, #statLabel {
+            color: white;
+        }
+        
+        #card {
+            background-color: white;
+            border-radius: 12px;
+            border: 1px solid #e1e8ed;
+        }
+        
+        #cardTitle {
+            color: #1a2332;
+        }
+        
+        #formLabel {
+            color: #5a6c7d;
+            letter-spacing: 0.5px;
+        }
+        
+        #formInput, QDateEdit {
+            background-color: #f0f4f8;
+            color: #1a2332;
+            border: 2px solid #e1e8ed;
+            border-radius: 8px;
+            padding: 12px;
+            font-size: 14px;
+        }
+        
+        #formInput:focus, QDateEdit:focus {
+            border-color: #00c896;
+            background-color: white;
+        }
+        
+        QDateEdit::drop-down {
+            border: none;
+            width: 30px;
+        }
+        
+        #btnPrimary {
+            background-color: #00c896;
+            color: white;
+            border: none;
+            border-radius: 8px;
+            padding: 12px 20px;
+            font-weight: 600;
+            font-size: 13px;
+            letter-spacing: 0.5px;
+        }
+        
+        #btnPrimary:hover {
+            background-color: #00a67d;
+        }
+        
+        #btnSecondary {
+            background-color: #f0f4f8;
+            color: #1a2332;
+            border: none;
+            border-radius: 8px;
+            padding: 12px 20px;
+            font-weight: 600;
+            font-size: 13px;
+            letter-spacing: 0.5px;
+        }
+        
+        #btnSecondary:hover {
+            background-color: #e1e8ed;
+        }
+        
+        #btnDanger {
+            background-color: #ff6b6b;
+            color: white;
+            border: none;
+            border-radius: 8px;
+            padding: 12px 20px;
+            font-weight: 600;
+            font-size: 13px;
+            letter-spacing: 0.5px;
+        }
+        
+        #btnDanger:hover {
+            background-color: #ee5a52;
+        }
+        
+        #table {
+            background-color: white;
+            border: none;
+            gridline-color: #e1e8ed;
+            selection-background-color: #e6f9f4;
+            selection-color: #1a2332;
+        }
+        
+        QTableView::item {
+            padding: 8px;
+        }
+        
+        QHeaderView::section {
+            background-color: #f0f4f8;
+            color: #5a6c7d;
+            padding: 12px;
+            border: none;
+            border-bottom: 2px solid #e1e8ed;
+            font-weight: 600;
+            font-size: 11px;
+            letter-spacing: 0.5px;
+        }
+        
+        #infoText {
+            color: #5a6c7d;
+            font-size: 13px;
+        }
+        
+        #separator {
+            color: #e1e8ed;
+        }
+    """,
+    True: """
+        QWidget {
+            background-color: #1a202c;
+            color: #e2e8f0;
+            font-family: 'Quicksand', 'Segoe UI', Arial, sans-serif;
+        }
+        
+        QScrollArea {
+            border: none;
+        }
+        
+        #header {
+            background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
+                        stop:0 #00a67d, stop:1 #008c69);
+            border: none;
+            background: transparent;
+        }
+        
+        #logoText, #statLabel {
+            color: white;
+            background: transparent;
+        }
+
+        #statValue {
+            color: white;
+            background: transparent;
+        }
+        
+        #card {
+            background-color: #2d3748;
+            border-radius: 12px;
+            border: 1px solid #4a5568;
+        }
+        
+        #cardTitle {
+            color: #e2e8f0;
+            background: transparent;
+        }
+        
+        #formLabel {
+            color: #a0aec0;
+            letter-spacing: 0.5px;
+            background: transparent;
+        }
+        
+        #formInput, QDateEdit {
+            background-color: #1a202c;
+            color: #e2e8f0;
+            border: 2px solid #4a5568;
+            border-radius: 8px;
+            padding: 12px;
+            font-size: 14px;
+        }
+        
+        #formInput:focus, QDateEdit:focus {
+            border-color: #00c896;
+            background: transparent;
+        }
+        
+        QDateEdit::drop-down {
+            border: none;
+            width: 30px;
+        }
+        
+        #btnPrimary {
+            background-color: #00c896;
+            color: white;
+            border: none;
+            border-radius: 8px;
+            padding: 12px 20px;
+            font-weight: 600;
+            font-size: 13px;
+            letter-spacing: 0.5px;
+        }
+        
+        #btnPrimary:hover {
+            background-color: #00a67d;
+        }
+        
+        #btnSecondary {
+            background-color: #4a5568;
+            color: white;
+            border: none;
+            border-radius: 8px;
+            padding: 12px 20px;
+            font-weight: 600;
+            font-size: 13px;
+            letter-spacing: 0.5px;
+        }
+        
+        #btnSecondary:hover {
+            background-color: #5a6678;
+        }
+        
+        #btnDanger {
+            background-color: #ff6b6b;
+            color: white;
+            border: none;
+            border-radius: 8px;
+            padding: 12px 20px;
+            font-weight: 600;
+            font-size: 13px;
+            letter-spacing: 0.5px;
+        }
+        
+        #btnDanger:hover {
+            background-color: #ee5a52;
+        }
+        
+        #table {
+            background-color: #2d3748;
+            border: none;
+            gridline-color: #4a5568;
+            selection-background-color: #00c896;
+        }
+        
+        QTableView::item {
+            padding: 8px;
+            color: #e2e8f0;
+        }
+        
+        QHeaderView::section {
+            background: transparent;
+            color: #a0aec0;
+            padding: 12px;
+            border: none;
+            border-bottom: 2px solid #4a5568;
+            font-weight: 600;
+            font-size: 11px;
+            letter-spacing: 0.5px;
+        }
+        
+        #infoText {
+            color: #a0aec0;
+            font-size: 13px;
+            background: transparent;
+        }
+        
+        #separator {
+            color: #4a5568;
+        }
+        
+        QMessageBox {
+            background-color: #2d3748;
+        }
+    """,
+}
+
+
+def format_amount(value):
+    """Format a calories/distance value as a whole number"""
+    return "0" if np.isnan(value) else str(int(value))
+
+
+def format_compact(value):
+    """Short header form of a total: 950, 12.3k, 4.56M"""
+    if value < 10_000:
+        return f"{value:,.0f}"
+    if value < 1_000_000:
+        return f"{value / 1_000:.1f}k"
+    return f"{value / 1_000_000:.2f}M"
+
+
+def read_history(conn):
+    """read_columns plus the training load built from them, for a worker thread"""
+    columns = read_columns(conn)
+    load = TrainingLoad()
+    if columns:
+        load.load(columns["days"], columns["calories"], columns["distance"])
+    else:
+        load.load([], [], [])
+    return columns, load
+
+
+def preload_chart_modules():
+    """Import matplotlib off the GUI thread so the first chart does not stall it"""
+    import matplotlib.figure
+    import charts
+    import render
+
+
+# History Model
+class WorkoutTableModel(QAbstractTableModel):
+    """Workout history model that exposes the workout cache one page at a time
+
+    While a search is active only the window rows whose id is in the search
+    result are shown, through an array of cache rows.
+    """
+
+    HEADERS = ["ID", "Date", "Calories", "Distance (yds)", "Description"]
+    PAGE_SIZE = 500
+    MAX_REMOVE_RUNS = 50
+
+    def __init__(self, cache, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.loaded = 0
+        self.match_ids = None
+        self.matches = None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row, column = self.cache_row(index.row()), index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                fit_id = self.cache.ids[row]
+                return str(fit_id) if fit_id < PENDING_ID else ""
+            if column == 1:
+                return self.cache.date(row)
+            if column == 2:
+                return format_amount(self.cache.calories[row])
+            if column == 3:
+                return format_amount(self.cache.distance[row])
+            return self.cache.description(row)
+        if role == Qt.TextAlignmentRole and column in (0, 2, 3):
+            return Qt.AlignCenter
+        return None
+
+    def cache_row(self, row):
+        return self.cache.start + row if self.matches is None else int(self.matches[row])
+
+    def cache_rows(self, rows):
+        """cache_row for an array of view rows"""
+        return self.cache.start + rows if self.matches is None else self.matches[rows]
+
+    def size(self):
+        """Rows available to fetch: the date window, or its search matches"""
+        return self.cache.window_size() if self.matches is None else len(self.matches)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded < self.size()
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+
+        count = min(self.PAGE_SIZE, self.size() - self.loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    def refresh(self):
+        """Go back to showing only the first page"""
+        self.beginResetModel()
+        self.matches = None if self.match_ids is None else self.find_matches()
+        self.loaded = 0
+        self.endResetModel()
+        self.fetchMore()
+
+    def set_matches(self, ids):
+        """Show only workouts whose id is in ``ids``; None shows the whole window"""
+        self.match_ids = ids
+        self.refresh()
+
+    def find_matches(self):
+        # A lookup table over the id range is linear, unlike sorting for np.isin;
+        # ids past the last match (such as pending ones) land on its False end
+        start, stop = self.cache.start, self.cache.stop
+        ids = self.cache.ids[start:stop]
+        if not len(ids) or not len(self.match_ids):
+            return np.empty(0, dtype=np.int64)
+        size = int(self.match_ids.max()) + 1
+        found = np.zeros(size + 1, dtype=bool)
+        found[self.match_ids] = True
+        return start + np.flatnonzero(found[np.minimum(ids, size)])
+
+    def workout_ids(self, rows):
+        return self.cache.ids[self.cache_rows(rows)]
+
+    def insert_workout(self, fit_id, date, calories, distance, description):
+        """Add a workout to the cache at its sorted (date, id) position"""
+        cache_row = self.cache.position(fit_id, date)
+        row = cache_row - self.cache.start
+
+        # While searching only shift the matches; a new search decides
+        # whether the workout is shown
+        if self.matches is not None:
+            self.cache.insert(cache_row, fit_id, date, calories, distance, description)
+            self.matches[self.matches >= cache_row] += 1
+            return
+
+        # Rows outside the date window, or sorting after everything shown,
+        # only change the cache; the latter arrive with a later fetchMore
+        if (not self.cache.in_window(day_number(date)) or row > self.loaded
+                or row == self.loaded and self.canFetchMore()):
+            self.cache.insert(cache_row, fit_id, date, calories, distance, description)
+            return
+
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.cache.insert(cache_row, fit_id, date, calories, distance, description)
+        self.loaded += 1
+        self.endInsertRows()
+
+    def rename_workouts(self, pairs):
+        """Give workouts their database ids from (pending id, id) ``pairs``"""
+        if not self.cache.rename(pairs):
+            if self.loaded:
+                self.dataChanged.emit(self.index(0, 0), self.index(self.loaded - 1, 0))
+            return
+
+        # AUTOINCREMENT ids only grow, so this is not expected; stay correct anyway
+        self.beginResetModel()
+        if self.matches is not None:
+            self.matches = self.find_matches()
+            self.loaded = min(self.loaded, len(self.matches))
+        self.endResetModel()
+
+    def remove_workouts(self, ids):
+        """Drop workouts by id wherever they are in the cache, with a model reset
+
+        For writes that failed after the rows were shown. Returns the removed
+        (days, calories, distance) columns.
+        """
+        cache_rows = np.flatnonzero(np.isin(self.cache.ids, ids))
+        removed = (self.cache.days[cache_rows], self.cache.calories[cache_rows], self.cache.distance[cache_rows])
+        if not len(cache_rows):
+            return removed
+
+        self.beginResetModel()
+        if self.matches is None:
+            shown = np.count_nonzero((cache_rows >= self.cache.start) & (cache_rows < self.cache.start + self.loaded))
+        else:
+            shown = np.count_nonzero(np.isin(self.matches[:self.loaded], cache_rows))
+            kept = self.matches[~np.isin(self.matches, cache_rows)]
+            self.matches = kept - np.searchsorted(cache_rows, kept)
+        self.cache.remove_rows(cache_rows)
+        self.loaded -= int(shown)
+        self.endResetModel()
+        return removed
+
+    def remove_rows(self, rows):
+        """Drop deleted workouts at sorted, unique view ``rows`` from the cache
+
+        The cache is cut once. The view hears about each contiguous run,
+        last first, so its scroll position survives; a scattered selection
+        resets the model instead.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        cache_rows = self.cache_rows(rows)
+        runs = np.split(rows, np.flatnonzero(np.diff(rows) != 1) + 1)[::-1]
+
+        def cut():
+            self.cache.remove_rows(cache_rows)
+            if self.matches is not None:
+                kept = np.delete(self.matches, rows)
+                self.matches = kept - np.searchsorted(cache_rows, kept)
+
+        if len(runs) > self.MAX_REMOVE_RUNS:
+            self.beginResetModel()
+            cut()
+            self.loaded -= len(rows)
+            self.endResetModel()
+            return
+
+        for i, run in enumerate(runs):
+            self.beginRemoveRows(QModelIndex(), int(run[0]), int(run[-1]))
+            if i == 0:
+                cut()
+            self.loaded -= len(run)
+            self.endRemoveRows()
+
 
 # Main Class
 class FitTrack(QWidget):
-    def __init__(self):
+    def __init__(self, repository=None):
         super().__init__()
         self.dark_mode_enabled = False
+        self.repository = repository or WorkoutRepository(DB_PATH)
+        self.cache = WorkoutCache()
+        self.load = TrainingLoad()
+        self.runner = TaskRunner(self.repository.db_path, self)
+        self.writer = WorkoutWriter(self.repository.db_path, parent=self)
+        self.next_pending = PENDING_ID
+        self.refresher = RefreshScheduler(self)
         self.settings()
         self.initUI()
         self.button_click()
+        self.register_views()
         self.update_stats()
+        self.reload_cache()
+
+        # Warm matplotlib once the event loop is running and the window painted
+        self.chart_modules_loaded = False
+        QTimer.singleShot(0, self.load_chart_modules)
 
     # Settings
     def settings(self):
@@ -109,15 +661,21 @@ class FitTrack(QWidget):
 
         # Stats section
         stats_layout = QHBoxLayout()
-        stats_layout.setSpacing(40)
+        stats_layout.setSpacing(28)
 
         self.stat_workouts = self.create_stat_widget("0", "WORKOUTS")
         self.stat_calories = self.create_stat_widget("0", "CALORIES")
         self.stat_distance = self.create_stat_widget("0", "YARDS")
+        self.stat_load_calories = self.create_stat_widget("0 / 0", "CAL 7D / 28D", 15)
+        self.stat_load_distance = self.create_stat_widget("0 / 0", "YDS 7D / 28D", 15)
+        self.stat_load_ratio = self.create_stat_widget("–", "ACUTE:CHRONIC", 15)
 
         stats_layout.addWidget(self.stat_workouts)
         stats_layout.addWidget(self.stat_calories)
         stats_layout.addWidget(self.stat_distance)
+        stats_layout.addWidget(self.stat_load_calories)
+        stats_layout.addWidget(self.stat_load_distance)
+        stats_layout.addWidget(self.stat_load_ratio)
 
         header_layout.addLayout(logo_layout)
         header_layout.addStretch()
@@ -125,7 +683,7 @@ class FitTrack(QWidget):
 
         return header
 
-    def create_stat_widget(self, value, label):
+    def create_stat_widget(self, value, label, size=20):
         """Create a stat display widget"""
         container = QFrame()
         layout = QVBoxLayout(container)
@@ -134,7 +692,7 @@ class FitTrack(QWidget):
         layout.setAlignment(Qt.AlignCenter)
 
         value_label = QLabel(value)
-        value_label.setFont(QFont("Space Mono", 20, QFont.Bold))
+        value_label.setFont(QFont("Space Mono", size, QFont.Bold))
         value_label.setObjectName("statValue")
         value_label.setAlignment(Qt.AlignCenter)
 
@@ -183,6 +741,7 @@ class FitTrack(QWidget):
         self.kal_box = QLineEdit()
         self.kal_box.setPlaceholderText("300")
         self.kal_box.setObjectName("formInput")
+        self.kal_box.setValidator(QRegularExpressionValidator(QRegularExpression(AMOUNT_PATTERN)))
         cal_layout.addWidget(cal_label)
         cal_layout.addWidget(self.kal_box)
         card_layout.addLayout(cal_layout)
@@ -195,6 +754,7 @@ class FitTrack(QWidget):
         self.distance_box = QLineEdit()
         self.distance_box.setPlaceholderText("1000")
         self.distance_box.setObjectName("formInput")
+        self.distance_box.setValidator(QRegularExpressionValidator(QRegularExpression(AMOUNT_PATTERN)))
         dist_layout.addWidget(dist_label)
         dist_layout.addWidget(self.distance_box)
         card_layout.addLayout(dist_layout)
@@ -246,7 +806,7 @@ class FitTrack(QWidget):
         card_layout.addWidget(title)
 
         # Info text
-        info = QLabel("Select a workout from the table below to delete it.")
+        info = QLabel("Select workouts in the table below to delete them. Shift or Ctrl-click to select several.")
         info.setWordWrap(True)
         info.setObjectName("infoText")
         card_layout.addWidget(info)
@@ -269,6 +829,18 @@ class FitTrack(QWidget):
         self.submit_btn.setCursor(Qt.PointingHandCursor)
         card_layout.addWidget(self.submit_btn)
 
+        # Import button
+        self.import_btn = QPushButton("📥 IMPORT FILES")
+        self.import_btn.setObjectName("btnSecondary")
+        self.import_btn.setCursor(Qt.PointingHandCursor)
+        card_layout.addWidget(self.import_btn)
+
+        # Track folder import button
+        self.import_folder_btn = QPushButton("🗂 IMPORT TRACK FOLDER")
+        self.import_folder_btn.setObjectName("btnSecondary")
+        self.import_folder_btn.setCursor(Qt.PointingHandCursor)
+        card_layout.addWidget(self.import_folder_btn)
+
         # Dark mode toggle
         self.dark_mode = QPushButton("🌙 TOGGLE DARK MODE")
         self.dark_mode.setObjectName("btnSecondary")
@@ -288,20 +860,92 @@ class FitTrack(QWidget):
         card_layout.setContentsMargins(25, 25, 25, 25)
         card_layout.setSpacing(15)
 
-        # Title
+        # Title and chart type
+        title_layout = QHBoxLayout()
         title = QLabel("📈 Performance Analysis")
         title.setFont(QFont("Quicksand", 16, QFont.DemiBold))
         title.setObjectName("cardTitle")
-        card_layout.addWidget(title)
-
-        # Chart
-        self.figure = plt.figure(figsize=(8, 5))
-        self.canvas = FigureCanvas(self.figure)
-        self.canvas.setMinimumHeight(350)
-        card_layout.addWidget(self.canvas)
+        self.chart_mode = QComboBox()
+        self.chart_mode.addItem("Distance vs. Calories", "scatter")
+        self.chart_mode.addItem("Weekly Totals", "week")
+        self.chart_mode.addItem("Monthly Totals", "month")
+        self.chart_mode.addItem("Yearly Totals", "year")
+        self.chart_mode.addItem("Training Load", "load")
+        self.chart_mode.setObjectName("formInput")
+        self.trend_box = QCheckBox("Trend")
+        self.trend_box.setObjectName("formLabel")
+        self.trend_box.setToolTip("Least-squares line and smoothed curve with 95% bands")
+        title_layout.addWidget(title)
+        title_layout.addStretch()
+        title_layout.addWidget(self.trend_box)
+        title_layout.addWidget(self.chart_mode)
+        card_layout.addLayout(title_layout)
+
+        # Placeholder until the first chart is requested (see ensure_chart)
+        self.renderer = self.chart_view = self.pixmaps = None
+        self.chart_scene = None
+        self.trend_fit = (None, None)
+        self.detail_window = self.detail_canvas = self.detail_chart = None
+        self.chart_placeholder = QLabel("Click GENERATE CHART to plot your workouts")
+        self.chart_placeholder.setObjectName("formLabel")
+        self.chart_placeholder.setAlignment(Qt.AlignCenter)
+        self.chart_placeholder.setMinimumHeight(350)
+        card_layout.addWidget(self.chart_placeholder)
+        self.chart_layout = card_layout
 
         return card
 
+    def load_chart_modules(self, then=None):
+        """Import matplotlib on a worker, then call ``then`` on the GUI thread"""
+        def loaded(_):
+            self.chart_modules_loaded = True
+            if then:
+                then()
+
+        self.runner.submit("preload", preload_chart_modules, on_result=loaded)
+
+    def ensure_chart(self):
+        """Import matplotlib and build the chart renderer and view on first use"""
+        if self.chart_view is not None:
+            return
+
+        from render import ChartRenderer, ChartView, PixmapCache
+
+        self.renderer = ChartRenderer(self.dark_mode_enabled)
+        self.pixmaps = PixmapCache()
+        self.chart_view = ChartView(self.dark_mode_enabled)
+        self.chart_view.setMinimumHeight(350)
+        # Stretch the last image while dragging; render once the size settles
+        self.chart_resize_timer = QTimer(self)
+        self.chart_resize_timer.setSingleShot(True)
+        self.chart_resize_timer.setInterval(60)
+        self.chart_resize_timer.timeout.connect(self.render_chart)
+        self.chart_view.resized.connect(self.chart_resize_timer.start)
+        self.chart_layout.replaceWidget(self.chart_placeholder, self.chart_view)
+        self.chart_placeholder.deleteLater()
+        self.chart_placeholder = None
+
+    def ensure_detail(self):
+        """Build the workout detail window on first use"""
+        if self.detail_window is not None:
+            return
+
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from charts import DetailChart
+
+        self.detail_window = QDialog(self)
+        self.detail_window.setWindowTitle("Workout Detail")
+        self.detail_window.setAttribute(Qt.WA_ShowWithoutActivating)
+        self.detail_window.resize(DETAIL_WIDTH, 520)
+        layout = QVBoxLayout(self.detail_window)
+        layout.setContentsMargins(10, 10, 10, 10)
+        figure = Figure(figsize=(9, 5))
+        self.detail_canvas = FigureCanvas(figure)
+        self.detail_chart = DetailChart(figure, self.dark_mode_enabled)
+        self.detail_canvas.mpl_connect("resize_event", lambda _: self.detail_chart.resample(self.detail_width()))
+        layout.addWidget(self.detail_canvas)
+
     def create_table_card(self):
         """Create workout history table card"""
         card = QFrame()
@@ -317,13 +961,54 @@ class FitTrack(QWidget):
         title.setObjectName("cardTitle")
         card_layout.addWidget(title)
 
+        # Date filter
+        filter_layout = QHBoxLayout()
+        filter_layout.setSpacing(10)
+
+        from_label = QLabel("FROM")
+        from_label.setFont(QFont("Quicksand", 10, QFont.Medium))
+        from_label.setObjectName("formLabel")
+        self.from_box = QDateEdit()
+        self.from_box.setCalendarPopup(True)
+        self.from_box.setObjectName("formInput")
+
+        to_label = QLabel("TO")
+        to_label.setFont(QFont("Quicksand", 10, QFont.Medium))
+        to_label.setObjectName("formLabel")
+        self.to_box = QDateEdit()
+        self.to_box.setCalendarPopup(True)
+        self.to_box.setObjectName("formInput")
+
+        self.show_all_btn = QPushButton("SHOW ALL")
+        self.show_all_btn.setObjectName("btnSecondary")
+        self.show_all_btn.setCursor(Qt.PointingHandCursor)
+
+        filter_layout.addWidget(from_label)
+        filter_layout.addWidget(self.from_box)
+        filter_layout.addWidget(to_label)
+        filter_layout.addWidget(self.to_box)
+        filter_layout.addStretch()
+        filter_layout.addWidget(self.show_all_btn)
+        card_layout.addLayout(filter_layout)
+        self.reset_filter_dates()
+
+        # Description search, run once typing pauses
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search descriptions, e.g. \"lap sw\"")
+        self.search_box.setObjectName("formInput")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        card_layout.addWidget(self.search_box)
+
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(["ID", "Date", "Calories", "Distance (yds)", "Description"])
+        self.table_model = WorkoutTableModel(self.cache, self)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SingleSelection)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.table.setAlternatingRowColors(False)
         self.table.verticalHeader().setVisible(False)
         self.table.setObjectName("table")
@@ -334,49 +1019,113 @@ class FitTrack(QWidget):
 
     # Events
     def button_click(self):
-        self.add_btn.clicked.connect(self.add_workout)
-        self.delete_btn.clicked.connect(self.delete_workout)
-        self.submit_btn.clicked.connect(self.calculate_calories)
-        self.dark_mode.clicked.connect(self.toggle_dark)
-        self.clear_btn.clicked.connect(self.reset)
+        # Slots are timed when profiling is enabled
+        slot = instrumentation.timed
+        self.add_btn.clicked.connect(slot("add_workout", self.add_workout))
+        self.delete_btn.clicked.connect(slot("delete_workout", self.delete_workout))
+        self.submit_btn.clicked.connect(slot("calculate_calories", self.calculate_calories))
+        self.dark_mode.clicked.connect(slot("toggle_dark", self.toggle_dark))
+        self.trend_box.toggled.connect(slot("toggle_trends", self.toggle_trends))
+        self.clear_btn.clicked.connect(slot("reset", self.reset))
+        self.import_btn.clicked.connect(slot("import_workouts", self.import_workouts))
+        self.import_folder_btn.clicked.connect(slot("import_track_folder", self.import_track_folder))
+        self.from_box.dateChanged.connect(slot("apply_date_filter", self.apply_date_filter))
+        self.to_box.dateChanged.connect(slot("apply_date_filter", self.apply_date_filter))
+        self.show_all_btn.clicked.connect(slot("clear_date_filter", self.clear_date_filter))
+        self.chart_mode.currentIndexChanged.connect(slot("change_chart_mode", self.change_chart_mode))
+        self.search_box.textChanged.connect(lambda _: self.search_timer.start())
+        self.search_timer.timeout.connect(slot("run_search", self.run_search))
+        self.writer.settled.connect(slot("apply_writes", self.apply_writes))
+        self.table.selectionModel().selectionChanged.connect(slot("request_detail", self.request_detail))
 
     # Load Tables
     def load_table(self):
-        self.table.setRowCount(0)
-        query = QSqlQuery("SELECT * FROM fitness ORDER BY date DESC")
-        row = 0
-        while query.next():
-            fit_id = query.value(0)
-            date = query.value(1)
-            calories = query.value(2)
-            distance = query.value(3)
-            description = query.value(4)
-
-            self.table.insertRow(row)
-            self.table.setItem(row, 0, QTableWidgetItem(str(fit_id)))
-            self.table.setItem(row, 1, QTableWidgetItem(date))
-            
-            # Handle calories - convert to number and format
-            try:
-                cal_value = float(calories) if calories else 0
-                self.table.setItem(row, 2, QTableWidgetItem(str(int(cal_value))))
-            except (ValueError, TypeError):
-                self.table.setItem(row, 2, QTableWidgetItem("0"))
-            
-            # Handle distance - convert to number and format
-            try:
-                dist_value = float(distance) if distance else 0
-                self.table.setItem(row, 3, QTableWidgetItem(str(int(dist_value))))
-            except (ValueError, TypeError):
-                self.table.setItem(row, 3, QTableWidgetItem("0"))
-            
-            self.table.setItem(row, 4, QTableWidgetItem(description if description else ""))
-            
-            # Center align numeric columns
-            for col in [0, 2, 3]:
-                self.table.item(row, col).setTextAlignment(Qt.AlignCenter)
-            
-            row += 1
+        self.table_model.refresh()
+
+    # Refresh
+    def register_views(self):
+        """Views that mutations mark dirty; each is refreshed at most once per tick"""
+        self.refresher.register("table", self.load_table)
+        self.refresher.register("stats", self.update_stats)
+        self.refresher.register("search", self.run_search, when=self.searching)
+        self.refresher.register("chart", lambda: self.request_chart(quiet=True), when=self.chart_showing)
+
+    # Date filter
+    def apply_date_filter(self):
+        first_day = day_number(self.from_box.date().toString("yyyy-MM-dd"))
+        last_day = day_number(self.to_box.date().toString("yyyy-MM-dd"))
+        self.set_window(first_day, last_day)
+
+    def clear_date_filter(self):
+        self.reset_filter_dates()
+        self.set_window(None, None)
+
+    def reset_filter_dates(self):
+        """Show the full history range in the filter pickers without filtering"""
+        today = QDate.currentDate()
+        days = self.cache.days[self.cache.days != MISSING_DAY]
+        oldest = QDate.fromString(self.cache.date(len(days) - 1), "yyyy-MM-dd") if len(days) else today
+        newest = QDate.fromString(self.cache.date(0), "yyyy-MM-dd") if len(days) else today
+
+        for box, date in ((self.from_box, oldest), (self.to_box, max(newest, today))):
+            box.blockSignals(True)
+            box.setDate(date)
+            box.blockSignals(False)
+
+    def set_window(self, first_day, last_day):
+        """Limit the table, header stats and chart to a day range"""
+        self.cache.set_window(first_day, last_day)
+        self.refresher.mark("table", "stats", "chart")
+
+    # Background loading
+    def reload_cache(self):
+        """Read the fitness table on a worker and swap it into the cache"""
+        self.flush_writes()
+        version = self.cache.version
+        self.runner.submit_query(
+            "cache", read_history,
+            on_result=lambda history: self.cache_loaded(*history, version),
+            on_error=lambda message: QMessageBox.warning(self, "Error", f"Could not load workouts: {message}")
+        )
+
+    def cache_loaded(self, columns, load, version):
+        # A workout was added or deleted while reading - the snapshot may miss it
+        if self.cache.version != version:
+            self.reload_cache()
+            return
+
+        filtered = self.cache.first_day is not None or self.cache.last_day is not None
+        self.cache.set_columns(columns)
+        self.load = load
+        if not filtered:
+            self.reset_filter_dates()
+        self.refresher.mark("table", "stats", "search", "chart")
+
+    # Search
+    def run_search(self):
+        """Filter the history to descriptions matching the search box"""
+        text = self.search_box.text()
+        if not search_terms(text):
+            self.runner.cancel("search")
+            if self.table_model.match_ids is not None:
+                self.table_model.set_matches(None)
+            return
+
+        self.runner.submit_query(
+            "search", search_ids, text,
+            on_result=self.table_model.set_matches,
+            on_error=self.search_failed
+        )
+
+    def search_failed(self, message):
+        # Show every workout rather than a stale filter; with no matches set
+        # the refresher stops re-running the failing search
+        if self.table_model.match_ids is not None:
+            self.table_model.set_matches(None)
+        QMessageBox.warning(self, "Error", f"Could not search workouts: {message}")
+
+    def searching(self):
+        return self.table_model.match_ids is not None
 
     # Add workout
     def add_workout(self):
@@ -389,15 +1138,19 @@ class FitTrack(QWidget):
             QMessageBox.warning(self, "Missing Data", "Please enter both calories and distance.")
             return
 
-        query = QSqlQuery("""
-                        INSERT INTO fitness (date, calories, distance, description)
-                          VALUES(?,?,?,?)
-                        """)
-        query.addBindValue(date)
-        query.addBindValue(calories)
-        query.addBindValue(distance)
-        query.addBindValue(description)
-        query.exec_()
+        # Store numbers, never the typed text; the validator leaves partial
+        # entries such as "1,05" in the box, so check it accepted them
+        acceptable = self.kal_box.hasAcceptableInput() and self.distance_box.hasAcceptableInput()
+        calories, distance = parse_amount(calories), parse_amount(distance)
+        if not acceptable or calories is None or distance is None:
+            QMessageBox.warning(self, "Invalid Data", "Calories and distance must be numbers, e.g. 300 or 1,050.")
+            return
+
+        try:
+            self.queue_workout(date, calories, distance, description)
+        except RuntimeError as e:
+            QMessageBox.warning(self, "Error", f"Could not save workout: {e}")
+            return
 
         # Success feedback
         original_text = self.add_btn.text()
@@ -408,473 +1161,405 @@ class FitTrack(QWidget):
             self.add_btn.setEnabled(True)
         ))
 
-        self.reset()
-        self.load_table()
-        self.update_stats()
+        self.clear_inputs()
+
+    def queue_workout(self, date, calories, distance, description):
+        """Show a workout now; the next group commit writes it (see apply_writes)"""
+        fit_id = self.next_pending
+        self.next_pending += 1
+        self.writer.add(fit_id, date, calories, distance, description)
+        self.table_model.insert_workout(fit_id, date, calories, distance, description)
+        self.load.apply([day_number(date)], [calories], [distance], 1)
+        self.refresher.mark("stats", "search", "chart")
+
+    def flush_writes(self):
+        """Write queued workouts now and give them their ids before the caller goes on"""
+        self.writer.flush()
+        self.apply_writes()
+
+    def apply_writes(self):
+        """Give saved workouts their database ids and take failed ones back out"""
+        saved, failures = self.writer.take_results()
+        if saved:
+            self.table_model.rename_workouts(saved)
+            # Rollup charts and the search index read the database
+            self.refresher.mark("search", "chart")
+        for rows, message in failures:
+            self.save_failed(rows, message)
+
+    def save_failed(self, rows, message):
+        """Take workouts the writer could not save out of the window, offering to retry"""
+        removed = self.table_model.remove_workouts([fit_id for fit_id, _ in rows])
+        self.load.apply(*removed, -1)
+        self.refresher.mark("stats", "search", "chart")
+        if not self.writer.running():
+            QMessageBox.warning(self, "Error", f"Could not save {len(rows):,} workout(s): {message}")
+            return
+        answer = QMessageBox.warning(
+            self, "Error", f"Could not save {len(rows):,} workout(s): {message}\n\nTry saving them again?",
+            QMessageBox.Retry | QMessageBox.Discard, QMessageBox.Retry)
+        if answer == QMessageBox.Retry:
+            for _, values in rows:
+                self.queue_workout(*values)
 
     # Delete workout
+    def selected_rows(self):
+        """Sorted table rows in the selection, built from its ranges rather than per-row indexes"""
+        ranges = self.table.selectionModel().selection()
+        if ranges.isEmpty():
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate([np.arange(selection.top(), selection.bottom() + 1)
+                                         for selection in ranges]))
+
+    def detail_width(self):
+        """Pixel columns the detail plot is downsampled to"""
+        if self.detail_canvas is None:
+            return DETAIL_WIDTH
+        return int(self.detail_canvas.width() * self.detail_canvas.devicePixelRatioF())
+
+    def request_detail(self):
+        """Load the samples of a single selected workout on a worker and plot them"""
+        rows = self.selected_rows()
+        if len(rows) != 1:
+            return
+
+        cache_row = self.table_model.cache_rows(rows)[0]
+        title = f"{self.cache.date(cache_row)}  {self.cache.description(cache_row)}".strip()
+        fit_id = int(self.table_model.workout_ids(rows)[0])
+        self.runner.submit_query("samples", detail_samples, fit_id, self.detail_width(),
+                                 on_result=lambda samples: self.show_detail(samples, title))
+
+    def show_detail(self, samples, title):
+        # Workouts entered by hand or imported from CSV have no samples
+        if samples is None:
+            return
+        if not self.chart_modules_loaded:
+            self.load_chart_modules(lambda: self.show_detail(samples, title))
+            return
+
+        self.ensure_detail()
+        self.detail_chart.show(samples, title)
+        self.detail_canvas.draw_idle()
+        if not self.detail_window.isVisible():
+            self.detail_window.show()
+
     def delete_workout(self):
-        selected_row = self.table.currentRow()
+        # Queued adds must be on disk, or a deleted one would be written after;
+        # flushing first also gives them their ids before the selection is read
+        self.flush_writes()
+        rows = self.selected_rows()
 
-        if selected_row == -1:
+        if not len(rows):
             QMessageBox.warning(self, "No Selection", "Please select a row to delete.")
             return
 
-        fit_id = int(self.table.item(selected_row, 0).text())
+        ids = self.table_model.workout_ids(rows)
+        message = ("Are you sure you want to delete this workout?" if len(rows) == 1
+                   else f"Are you sure you want to delete these {len(rows):,} workouts?")
         confirm = QMessageBox.question(
             self, 
             "Confirm Delete", 
-            "Are you sure you want to delete this workout?",
+            message,
             QMessageBox.Yes | QMessageBox.No
         )
 
         if confirm == QMessageBox.No:
             return
         
-        query = QSqlQuery()
-        query.prepare("DELETE FROM fitness WHERE id = ?")
-        query.addBindValue(fit_id)
-        query.exec_()
+        try:
+            instrumentation.call("sql delete workouts", self.repository.delete_many, ids)
+        except sqlite3.Error as e:
+            QMessageBox.warning(self, "Error", f"Could not delete workouts: {e}")
+            return
 
-        self.load_table()
-        self.update_stats()
+        cache_rows = self.table_model.cache_rows(rows)
+        removed = (self.cache.days[cache_rows], self.cache.calories[cache_rows], self.cache.distance[cache_rows])
+        self.table.clearSelection()
+        self.table_model.remove_rows(rows)
+        self.load.apply(*removed, -1)
+        self.refresher.mark("stats", "chart")
+
+    # Import workouts
+    def import_workouts(self):
+        paths, _ = QFileDialog.getOpenFileNames(
+            self, "Import Workouts", "",
+            "Workout Files (*.csv *.gpx *.tcx);;CSV Files (*.csv);;GPX/TCX Tracks (*.gpx *.tcx)")
+        if paths:
+            self.start_import(import_files, paths)
+
+    def import_track_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Import Track Folder")
+        if folder:
+            self.start_import(import_folder, folder)
+
+    def start_import(self, fn, source):
+        """Run an importer on a worker behind a progress dialog, then reload"""
+        # Queued adds go first, so the reload after the import has their ids
+        self.flush_writes()
+        progress = QProgressDialog("Importing workouts...", None, 0, 1000, self)
+        progress.setWindowTitle("Import Workouts")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.setValue(0)
+
+        def report(done, total):
+            progress.setValue(int(done * 1000 / total) if total else 1000)
+
+        def finished(result):
+            progress.close()
+            imported, skipped = result
+
+            # One refresh for the whole import
+            self.reload_cache()
+
+            message = f"Imported {imported:,} workouts."
+            if skipped:
+                message += f" Skipped {skipped:,} rows or files with missing or invalid values."
+            QMessageBox.information(self, "Import Complete", message)
+
+        def failed(message):
+            progress.close()
+            QMessageBox.warning(self, "Import Failed", message)
+
+        self.runner.submit("import", fn, source, self.repository.db_path,
+                           on_result=finished, on_error=failed, on_progress=report)
 
     # Calculate and visualize
     def calculate_calories(self):
-        distances = []
-        calories = []
-
-        query = QSqlQuery("SELECT distance, calories FROM fitness ORDER BY distance ASC")
-        while query.next():
-            distance = query.value(0)
-            calorie = query.value(1)
-            if distance and calorie:
-                try:
-                    # Remove commas and convert to float
-                    distance_clean = str(distance).replace(',', '')
-                    calorie_clean = str(calorie).replace(',', '')
-                    distances.append(float(distance_clean))
-                    calories.append(float(calorie_clean))
-                except (ValueError, TypeError):
-                    # Skip invalid entries
-                    continue
-
-        if not distances or not calories:
-            QMessageBox.warning(self, "No Data", "Please add some workouts first!")
+        self.request_chart(quiet=False)
+
+    def request_chart(self, quiet=True):
+        """Prepare chart data on a worker; a newer request drops an older one"""
+        if not self.chart_modules_loaded:
+            self.load_chart_modules(lambda: self.request_chart(quiet))
             return
 
-        try:
-            # Clear previous plot
-            self.figure.clear()
-
-            # Create scatter plot with gradient coloring
-            min_calorie = min(calories)
-            max_calorie = max(calories)
-            
-            if max_calorie > min_calorie:
-                normalized_calories = [(cal - min_calorie) / (max_calorie - min_calorie) for cal in calories]
-            else:
-                normalized_calories = [0.5] * len(calories)
-
-            # Set style based on theme
-            if self.dark_mode_enabled:
-                plt.style.use('dark_background')
-                bg_color = '#2d3748'
-                text_color = '#e2e8f0'
-            else:
-                plt.style.use('default')
-                bg_color = '#ffffff'
-                text_color = '#2d3748'
-
-            ax = self.figure.add_subplot(111)
-            scatter = ax.scatter(
-                distances, 
-                calories, 
-                c=normalized_calories, 
-                cmap='viridis', 
-                s=100,
-                alpha=0.7,
-                edgecolors='white',
-                linewidth=1.5
-            )
-            
-            ax.set_title("Distance vs. Calories Burned", 
-                        fontsize=14, 
-                        fontweight='bold',
-                        color=text_color,
-                        pad=20)
-            ax.set_xlabel("Distance (yards)", fontsize=11, color=text_color)
-            ax.set_ylabel("Calories Burned", fontsize=11, color=text_color)
-            
-            # Add colorbar
-            cbar = self.figure.colorbar(scatter, ax=ax)
-            cbar.set_label("Normalized Calories", color=text_color)
-            
-            # Style the plot
-            ax.grid(True, alpha=0.2)
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            
-            self.figure.patch.set_facecolor(bg_color)
-            ax.set_facecolor(bg_color)
-            ax.tick_params(colors=text_color)
-            
-            self.figure.tight_layout()
-            self.canvas.draw()
-
-        except Exception as e:
-            print(f"ERROR: {e}")
-            QMessageBox.warning(self, "Error", "Could not generate chart. Please try again.")
+        self.ensure_chart()
+        period = self.chart_mode.currentData()
+        if period == "load":
+            self.request_load_chart()
+            return
+        if period != "scatter":
+            self.request_period_chart(period)
+            return
+
+        distances, calories = self.cache.window_columns()
+        data_key = self.trend_key()
+        trend_key = data_key if self.trend_box.isChecked() else None
+        self.runner.submit(
+            "chart", self.prepare_chart, distances, calories, trend_key is not None, self.cached_trends(trend_key),
+            on_result=lambda prepared: self.show_chart(prepared, quiet, trend_key, data_key),
+            on_error=self.chart_failed
+        )
+
+    def request_period_chart(self, period):
+        # All-time totals come from the rollup tables; a date window is
+        # bucketed from the cache instead
+        data_key = self.trend_key()
+        on_result = lambda totals: self.show_period_chart(totals, period, data_key)
+        if self.cache.first_day is None and self.cache.last_day is None:
+            self.runner.submit_query("chart", read_rollup, period,
+                                     on_result=on_result, on_error=self.chart_failed)
+        else:
+            distances, calories = self.cache.window_columns()
+            self.runner.submit("chart", bucket_totals, self.cache.window_days(), calories, distances,
+                               period, on_result=on_result, on_error=self.chart_failed)
+
+    def show_period_chart(self, totals, period, data_key):
+        self.set_chart_scene(("period", period, *data_key), (totals, period))
+
+    # Training load
+    def load_day(self):
+        """Day the header load stats are taken on: today, or the end of the date window"""
+        today = day_number(QDate.currentDate().toString("yyyy-MM-dd"))
+        return today if self.cache.last_day is None else min(today, self.cache.last_day)
+
+    def request_load_chart(self):
+        first_day = self.load.first_day if self.cache.first_day is None else self.cache.first_day
+        last_day = self.load.first_day + self.load.days() - 1 if self.cache.last_day is None else self.cache.last_day
+        data_key = self.trend_key()
+        self.runner.submit("chart", load_series, self.load, first_day, last_day,
+                           on_result=lambda series: self.show_load_chart(series, data_key),
+                           on_error=self.chart_failed)
+
+    def show_load_chart(self, series, data_key):
+        self.set_chart_scene(("load", *data_key), series)
+
+    # Trend overlay
+    def trend_key(self):
+        """What a trend fit depends on: the cached rows and the date window"""
+        return (self.cache.version, self.cache.first_day, self.cache.last_day)
+
+    def cached_trends(self, key):
+        return self.trend_fit[1] if key is not None and self.trend_fit[0] == key else None
+
+    def toggle_trends(self):
+        """Show or hide the overlay, refitting only if the data changed since the last fit"""
+        if self.chart_scene is None or self.chart_scene[0][0] != "scatter":
+            return
+        trends = self.cached_trends(self.trend_key())
+        if self.trend_box.isChecked() and trends is None:
+            self.request_chart(quiet=True)
+            return
+        key, (_, prepared) = self.chart_scene
+        prepared = {name: value for name, value in prepared.items() if name != "trends"}
+        if self.trend_box.isChecked():
+            prepared["trends"] = trends
+        self.set_chart_scene(("scatter", *key[1:4], "trends" in prepared), prepared)
+
+    def change_chart_mode(self):
+        if self.chart_showing():
+            self.request_chart(quiet=True)
+
+    def chart_showing(self):
+        return self.chart_scene is not None
+
+    def prepare_chart(self, distances, calories, with_trends=False, trends=None):
+        # Runs on a worker thread; ``trends`` is a cached fit to reuse
+        distances, calories = valid_points(distances, calories)
+        if not len(distances):
+            return None
+        prepared = self.renderer.charts["scatter"].prepare(distances, calories)
+        if with_trends:
+            prepared["trends"] = trends if trends is not None else fit_trends(distances, calories)
+        return prepared
+
+    def show_chart(self, prepared, quiet, trend_key, data_key):
+        if prepared is None:
+            if not quiet:
+                QMessageBox.warning(self, "No Data", "Please add some workouts first!")
+            return
+
+        if "trends" in prepared:
+            self.trend_fit = (trend_key, prepared["trends"])
+        self.set_chart_scene(("scatter", *data_key, "trends" in prepared), prepared)
+
+    # Chart rendering
+    def set_chart_scene(self, key, data):
+        """Show ``data`` as the chart; ``key`` names it in the pixmap cache
+
+        Keys start with the chart kind and include the cache version and
+        date window, so any change to the rows gives a new key.
+        """
+        self.chart_scene = (key, (key[0], data))
+        self.render_chart()
+
+    def chart_key(self):
+        """Pixmap cache key for the current scene, theme and view size"""
+        view = self.chart_view
+        return (self.chart_scene[0], self.dark_mode_enabled, view.width(), view.height(), view.devicePixelRatioF())
+
+    def render_chart(self):
+        """Show the cached pixmap for the scene, theme and size, or render it on a worker"""
+        if self.chart_scene is None or self.chart_view.width() < 1 or self.chart_view.height() < 1:
+            return
+        key = self.chart_key()
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            self.chart_view.set_pixmap(pixmap)
+            return
+        _, dark, width, height, ratio = key
+        self.runner.submit("render", self.renderer.render, self.chart_scene[1], dark, width, height, ratio,
+                           on_result=lambda image: self.chart_rendered(key, image),
+                           on_error=self.chart_failed)
+
+    def chart_rendered(self, key, image):
+        pixmap = QPixmap.fromImage(image)
+        self.pixmaps.put(key, pixmap)
+        # Keep the cached image but do not show it after a reset
+        if self.chart_scene is not None and key == self.chart_key():
+            self.chart_view.set_pixmap(pixmap)
+
+    def chart_failed(self, message):
+        print(f"ERROR: {message}")
+        QMessageBox.warning(self, "Error", "Could not generate chart. Please try again.")
 
     def update_stats(self):
         """Update the statistics in the header"""
-        try:
-            query = QSqlQuery("SELECT COUNT(*), SUM(calories), SUM(distance) FROM fitness")
-            if query.next():
-                workouts = query.value(0) or 0
-                total_calories = query.value(1) or 0
-                total_distance = query.value(2) or 0
-
-                # Update stat displays with proper formatting
-                self.stat_workouts.findChild(QLabel, "statValue").setText(str(workouts))
-                self.stat_calories.findChild(QLabel, "statValue").setText(f"{int(float(total_calories)):,}")
-                self.stat_distance.findChild(QLabel, "statValue").setText(f"{int(float(total_distance)):,}")
-        except (ValueError, TypeError) as e:
-            print(f"Error updating stats: {e}")
-            # Set default values if there's an error
-            self.stat_workouts.findChild(QLabel, "statValue").setText("0")
-            self.stat_calories.findChild(QLabel, "statValue").setText("0")
-            self.stat_distance.findChild(QLabel, "statValue").setText("0")
+        workouts, total_calories, total_distance = self.cache.totals
+        self.stat_workouts.findChild(QLabel, "statValue").setText(str(workouts))
+        self.stat_calories.findChild(QLabel, "statValue").setText(f"{int(total_calories):,}")
+        self.stat_distance.findChild(QLabel, "statValue").setText(f"{int(total_distance):,}")
+
+        # Rolling load is O(1) from the prefix sums
+        load = load_summary(self.load, self.load_day())
+        self.stat_load_calories.findChild(QLabel, "statValue").setText(
+            f"{format_compact(load['acute_calories'])} / {format_compact(load['chronic_calories'])}")
+        self.stat_load_distance.findChild(QLabel, "statValue").setText(
+            f"{format_compact(load['acute_distance'])} / {format_compact(load['chronic_distance'])}")
+        ratio = load["calories_ratio"]
+        self.stat_load_ratio.findChild(QLabel, "statValue").setText("–" if np.isnan(ratio) else f"{ratio:.2f}")
+        self.stat_load_ratio.setToolTip(
+            "Last 7 days against the 28-day weekly average (calories)"
+            + ("" if np.isnan(load["distance_ratio"]) else f"; distance {load['distance_ratio']:.2f}"))
 
     def apply_styles(self):
         """Apply modern stylesheet"""
-        if self.dark_mode_enabled:
-            stylesheet = """
-                QWidget {
-                    background-color: #1a202c;
-                    color: #e2e8f0;
-                    font-family: 'Quicksand', 'Segoe UI', Arial, sans-serif;
-                }
-                
-                QScrollArea {
-                    border: none;
-                }
-                
-                #header {
-                    background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
-                                stop:0 #00a67d, stop:1 #008c69);
-                    border: none;
-                    background: transparent;
-                }
-                
-                #logoText, #statLabel {
-                    color: white;
-                    background: transparent;
-                }
-
-                #statValue {
-                    color: white;
-                    background: transparent;
-                }
-                
-                #card {
-                    background-color: #2d3748;
-                    border-radius: 12px;
-                    border: 1px solid #4a5568;
-                }
-                
-                #cardTitle {
-                    color: #e2e8f0;
-                    background: transparent;
-                }
-                
-                #formLabel {
-                    color: #a0aec0;
-                    letter-spacing: 0.5px;
-                    background: transparent;
-                }
-                
-                #formInput, QDateEdit {
-                    background-color: #1a202c;
-                    color: #e2e8f0;
-                    border: 2px solid #4a5568;
-                    border-radius: 8px;
-                    padding: 12px;
-                    font-size: 14px;
-                }
-                
-                #formInput:focus, QDateEdit:focus {
-                    border-color: #00c896;
-                    background: transparent;
-                }
-                
-                QDateEdit::drop-down {
-                    border: none;
-                    width: 30px;
-                }
-                
-                #btnPrimary {
-                    background-color: #00c896;
-                    color: white;
-                    border: none;
-                    border-radius: 8px;
-                    padding: 12px 20px;
-                    font-weight: 600;
-                    font-size: 13px;
-                    letter-spacing: 0.5px;
-                }
-                
-                #btnPrimary:hover {
-                    background-color: #00a67d;
-                }
-                
-                #btnSecondary {
-                    background-color: #4a5568;
-                    color: white;
-                    border: none;
-                    border-radius: 8px;
-                    padding: 12px 20px;
-                    font-weight: 600;
-                    font-size: 13px;
-                    letter-spacing: 0.5px;
-                }
-                
-                #btnSecondary:hover {
-                    background-color: #5a6678;
-                }
-                
-                #btnDanger {
-                    background-color: #ff6b6b;
-                    color: white;
-                    border: none;
-                    border-radius: 8px;
-                    padding: 12px 20px;
-                    font-weight: 600;
-                    font-size: 13px;
-                    letter-spacing: 0.5px;
-                }
-                
-                #btnDanger:hover {
-                    background-color: #ee5a52;
-                }
-                
-                #table {
-                    background-color: #2d3748;
-                    border: none;
-                    gridline-color: #4a5568;
-                    selection-background-color: #00c896;
-                }
-                
-                QTableWidget::item {
-                    padding: 8px;
-                    color: #e2e8f0;
-                }
-                
-                QHeaderView::section {
-                    background: transparent;
-                    color: #a0aec0;
-                    padding: 12px;
-                    border: none;
-                    border-bottom: 2px solid #4a5568;
-                    font-weight: 600;
-                    font-size: 11px;
-                    letter-spacing: 0.5px;
-                }
-                
-                #infoText {
-                    color: #a0aec0;
-                    font-size: 13px;
-                    background: transparent;
-                }
-                
-                #separator {
-                    color: #4a5568;
-                }
-                
-                QMessageBox {
-                    background-color: #2d3748;
-                }
-            """
-        else:
-            stylesheet = """
-                QWidget {
-                    background-color: #f8fafb;
-                    color: #1a2332;
-                    font-family: 'Quicksand', 'Segoe UI', Arial, sans-serif;
-                }
-                
-                QScrollArea {
-                    border: none;
-                }
-                
-                #header {
-                    background: qlineargradient(x1:0, y1:0, x2:1, y2:0,
-                                stop:0 #00c896, stop:1 #00a67d);
-                    border: none;
-                }
-                
-                #logoText, #statValue, #statLabel {
-                    color: white;
-                }
-                
-                #card {
-                    background-color: white;
-                    border-radius: 12px;
-                    border: 1px solid #e1e8ed;
-                }
-                
-                #cardTitle {
-                    color: #1a2332;
-                }
-                
-                #formLabel {
-                    color: #5a6c7d;
-                    letter-spacing: 0.5px;
-                }
-                
-                #formInput, QDateEdit {
-                    background-color: #f0f4f8;
-                    color: #1a2332;
-                    border: 2px solid #e1e8ed;
-                    border-radius: 8px;
-                    padding: 12px;
-                    font-size: 14px;
-                }
-                
-                #formInput:focus, QDateEdit:focus {
-                    border-color: #00c896;
-                    background-color: white;
-                }
-                
-                QDateEdit::drop-down {
-                    border: none;
-                    width: 30px;
-                }
-                
-                #btnPrimary {
-                    background-color: #00c896;
-                    color: white;
-                    border: none;
-                    border-radius: 8px;
-                    padding: 12px 20px;
-                    font-weight: 600;
-                    font-size: 13px;
-                    letter-spacing: 0.5px;
-                }
-                
-                #btnPrimary:hover {
-                    background-color: #00a67d;
-                }
-                
-                #btnSecondary {
-                    background-color: #f0f4f8;
-                    color: #1a2332;
-                    border: none;
-                    border-radius: 8px;
-                    padding: 12px 20px;
-                    font-weight: 600;
-                    font-size: 13px;
-                    letter-spacing: 0.5px;
-                }
-                
-                #btnSecondary:hover {
-                    background-color: #e1e8ed;
-                }
-                
-                #btnDanger {
-                    background-color: #ff6b6b;
-                    color: white;
-                    border: none;
-                    border-radius: 8px;
-                    padding: 12px 20px;
-                    font-weight: 600;
-                    font-size: 13px;
-                    letter-spacing: 0.5px;
-                }
-                
-                #btnDanger:hover {
-                    background-color: #ee5a52;
-                }
-                
-                #table {
-                    background-color: white;
-                    border: none;
-                    gridline-color: #e1e8ed;
-                    selection-background-color: #e6f9f4;
-                    selection-color: #1a2332;
-                }
-                
-                QTableWidget::item {
-                    padding: 8px;
-                }
-                
-                QHeaderView::section {
-                    background-color: #f0f4f8;
-                    color: #5a6c7d;
-                    padding: 12px;
-                    border: none;
-                    border-bottom: 2px solid #e1e8ed;
-                    font-weight: 600;
-                    font-size: 11px;
-                    letter-spacing: 0.5px;
-                }
-                
-                #infoText {
-                    color: #5a6c7d;
-                    font-size: 13px;
-                }
-                
-                #separator {
-                    color: #e1e8ed;
-                }
-            """
-
-        self.setStyleSheet(stylesheet)
+        self.setStyleSheet(THEME_STYLESHEETS[self.dark_mode_enabled])
 
     def toggle_dark(self):
         """Toggle between light and dark mode"""
         self.dark_mode_enabled = not self.dark_mode_enabled
         self.apply_styles()
         
-        # Update chart if it exists
-        if self.figure.get_axes():
-            self.calculate_calories()
+        if self.detail_chart is not None:
+            self.detail_chart.apply_theme(self.dark_mode_enabled)
+            self.detail_canvas.draw_idle()
+
+        # Both themes of a scene stay cached, so toggling back is a pixmap swap
+        if self.chart_view is None:
+            return
+        self.chart_view.set_theme(self.dark_mode_enabled)
+        self.render_chart()
 
     def reset(self):
-        """Clear all input fields"""
+        """Clear all input fields and hide the chart"""
+        self.clear_inputs()
+        if self.chart_view is not None:
+            self.chart_scene = None
+            self.chart_view.set_pixmap(None)
+
+    def clear_inputs(self):
         self.date_box.setDate(QDate.currentDate())
         self.kal_box.clear()
         self.distance_box.clear()
         self.description.clear()
-        self.figure.clear()
-        self.canvas.draw()
-
-
-# Initialize Database
-db = QSqlDatabase.addDatabase("QSQLITE")
-db.setDatabaseName("fitness.db")
 
-if not db.open():
-    QMessageBox.critical(None, "ERROR", "Cannot open the database")
-    exit(2)
+    def closeEvent(self, event):
+        """Stop background work before the window and its signals go away"""
+        # Save queued workouts while failures can still be shown; a retry
+        # queues them again, so flush until nothing is left
+        self.flush_writes()
+        while self.writer.running() and self.writer.pending():
+            self.flush_writes()
+        self.writer.close()
+        self.runner.shutdown()
+        self.repository.close()
+        super().closeEvent(event)
 
-query = QSqlQuery()
-query.exec_("""
-            CREATE TABLE IF NOT EXISTS fitness (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT,
-                calories REAL,
-                distance REAL,
-                description TEXT
-            )
-            """)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FitTrack - Modern Fitness Tracker")
+    parser.add_argument("--profile", metavar="PATH",
+                        help=f"record latency histograms to a .json or .csv file (or set {instrumentation.ENV_VAR})")
+    args, _ = parser.parse_known_args()
+    if args.profile:
+        instrumentation.enable(args.profile)
+    else:
+        instrumentation.enable_from_environment()
+
     app = QApplication([])
     
     # Set application-wide font
     app.setFont(QFont("Quicksand", 10))
-    
-    main = FitTrack()
+
+    # Initialize Database
+    try:
+        repository = WorkoutRepository(DB_PATH)
+    except sqlite3.Error:
+        QMessageBox.critical(None, "ERROR", "Cannot open the database")
+        exit(2)
+
+    main = FitTrack(repository)
     main.show()
     app.exec_()
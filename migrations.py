@@ -0,0 +1,270 @@
+# Imports
+import sqlite3
+
+import numpy as np
+
+from workout_cache import clean_number
+
+
+# Days since 1970-01-01 for the date column; NULL when the date cannot be parsed
+DAY_EXPR = "CAST(julianday({column}) - 2440587.5 AS INTEGER)"
+
+
+def create_fitness_table(conn):
+    conn.execute("""
+                 CREATE TABLE IF NOT EXISTS fitness (
+                     id INTEGER PRIMARY KEY AUTOINCREMENT,
+                     date TEXT,
+                     calories REAL,
+                     distance REAL,
+                     description TEXT
+                 )
+                 """)
+
+
+def add_day_column(conn):
+    conn.execute("ALTER TABLE fitness ADD COLUMN day INTEGER")
+    conn.execute(f"UPDATE fitness SET day = {DAY_EXPR.format(column='date')}")
+    # For day range queries; date and distance are not indexed, as the app
+    # reads history through the in-memory cache and each index costs a
+    # B-tree write per inserted or deleted row
+    conn.execute("CREATE INDEX idx_fitness_day ON fitness (day)")
+
+    # Keep day in step with date for rows written by any client
+    conn.execute(f"""
+                 CREATE TRIGGER fitness_day_insert AFTER INSERT ON fitness
+                 BEGIN
+                     UPDATE fitness SET day = {DAY_EXPR.format(column='NEW.date')}
+                     WHERE id = NEW.id;
+                 END
+                 """)
+    conn.execute(f"""
+                 CREATE TRIGGER fitness_day_update AFTER UPDATE OF date ON fitness
+                 BEGIN
+                     UPDATE fitness SET day = {DAY_EXPR.format(column='NEW.date')}
+                     WHERE id = NEW.id;
+                 END
+                 """)
+
+
+# Rollup period keys: Monday day number, months since 1970-01, calendar year
+ROLLUP_PERIODS = {
+    "week": "(({day}) - ((({day}) + 3) % 7 + 7) % 7)",
+    "month": "((CAST(strftime('%Y', {date}) AS INTEGER) - 1970) * 12"
+             " + CAST(strftime('%m', {date}) AS INTEGER) - 1)",
+    "year": "CAST(strftime('%Y', {date}) AS INTEGER)",
+}
+
+# Stored amounts may still be text such as "1,050"
+AMOUNT_EXPR = "IFNULL(CAST(REPLACE({column}, ',', '') AS REAL), 0)"
+
+
+def period_expr(period, row):
+    """SQL for the rollup key of ``row`` ("NEW", "OLD" or "" for fitness)"""
+    date = f"{row}.date" if row else "date"
+    return ROLLUP_PERIODS[period].format(day=DAY_EXPR.format(column=date), date=date)
+
+
+def rollup_select(period, row_filter):
+    """Grouped per-period totals of the fitness rows matching ``row_filter``"""
+    key = period_expr(period, "")
+    return f"""
+        SELECT {key} AS period, COUNT(*),
+               SUM({AMOUNT_EXPR.format(column='calories')}),
+               SUM({AMOUNT_EXPR.format(column='distance')})
+        FROM fitness WHERE {row_filter} AND period IS NOT NULL GROUP BY period"""
+
+
+def rollup_apply(period, row, sign):
+    """Statements adding (sign "+") or removing (sign "-") ``row`` from a rollup"""
+    key = period_expr(period, row)
+    calories = AMOUNT_EXPR.format(column=f"{row}.calories")
+    distance = AMOUNT_EXPR.format(column=f"{row}.distance")
+    statements = [f"""
+        INSERT INTO rollup_{period} (period, workouts, calories, distance)
+        SELECT {key}, {sign}1, {sign}{calories}, {sign}{distance} WHERE {key} IS NOT NULL
+        ON CONFLICT (period) DO UPDATE SET
+            workouts = workouts + excluded.workouts,
+            calories = calories + excluded.calories,
+            distance = distance + excluded.distance;"""]
+    if sign == "-":
+        statements.append(f"DELETE FROM rollup_{period} WHERE period = {key} AND workouts <= 0;")
+    return "\n".join(statements)
+
+
+def add_rollup_tables(conn):
+    for period in ROLLUP_PERIODS:
+        conn.execute(f"""
+                     CREATE TABLE rollup_{period} (
+                         period INTEGER PRIMARY KEY,
+                         workouts INTEGER NOT NULL,
+                         calories REAL NOT NULL,
+                         distance REAL NOT NULL
+                     )
+                     """)
+        conn.execute(f"INSERT INTO rollup_{period} {rollup_select(period, '1')}")
+
+    # Bulk writers set deferred inside their transaction and fold the new rows
+    # in with one grouped statement (rollups.catch_up_rollups) instead of per-row triggers
+    conn.execute("""
+                 CREATE TABLE rollup_state (
+                     id INTEGER PRIMARY KEY CHECK (id = 0),
+                     deferred INTEGER NOT NULL
+                 )
+                 """)
+    conn.execute("INSERT INTO rollup_state (id, deferred) VALUES (0, 0)")
+    active = "WHEN (SELECT deferred FROM rollup_state) = 0"
+
+    # Triggers keep every rollup exact for writes from any client
+    add_new = "".join(rollup_apply(period, "NEW", "+") for period in ROLLUP_PERIODS)
+    remove_old = "".join(rollup_apply(period, "OLD", "-") for period in ROLLUP_PERIODS)
+    conn.execute(f"CREATE TRIGGER fitness_rollup_insert AFTER INSERT ON fitness {active} BEGIN {add_new} END")
+    conn.execute(f"CREATE TRIGGER fitness_rollup_delete AFTER DELETE ON fitness {active} BEGIN {remove_old} END")
+    conn.execute(f"""
+                 CREATE TRIGGER fitness_rollup_update AFTER UPDATE OF date, calories, distance ON fitness
+                 {active} BEGIN {remove_old} {add_new} END
+                 """)
+
+    # Writers that already know the day number skip the extra UPDATE per row
+    conn.execute("DROP TRIGGER fitness_day_insert")
+    conn.execute(f"""
+                 CREATE TRIGGER fitness_day_insert AFTER INSERT ON fitness WHEN NEW.day IS NULL
+                 BEGIN
+                     UPDATE fitness SET day = {DAY_EXPR.format(column='NEW.date')}
+                     WHERE id = NEW.id;
+                 END
+                 """)
+
+
+def _stored_amount(value):
+    number = clean_number(value)
+    return None if np.isnan(number) else number
+
+
+def normalize_amounts(conn):
+    # Older builds stored the form text as typed ("1,050"); store numbers, or
+    # NULL for text that was never a number. The rollup triggers follow along
+    rows = conn.execute("""
+                        SELECT id, calories, distance FROM fitness
+                        WHERE typeof(calories) = 'text' OR typeof(distance) = 'text'
+                        """).fetchall()
+    conn.executemany(
+        "UPDATE fitness SET calories = ?, distance = ? WHERE id = ?",
+        ((_stored_amount(calories), _stored_amount(distance), fit_id) for fit_id, calories, distance in rows),
+    )
+
+
+def add_description_search(conn):
+    # External-content FTS5 index over description; rowid is fitness.id
+    try:
+        conn.execute("""
+                     CREATE VIRTUAL TABLE fitness_search USING fts5(
+                         description, content='fitness', content_rowid='id'
+                     )
+                     """)
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5; repository.search_ids falls back to LIKE
+        return
+    conn.execute("INSERT INTO fitness_search (fitness_search) VALUES ('rebuild')")
+
+    # Bulk imports defer this like the rollup triggers (repository.catch_up_search)
+    conn.execute("""
+                 CREATE TRIGGER fitness_search_insert AFTER INSERT ON fitness
+                 WHEN (SELECT deferred FROM rollup_state) = 0
+                 BEGIN
+                     INSERT INTO fitness_search (rowid, description) VALUES (NEW.id, NEW.description);
+                 END
+                 """)
+    conn.execute("""
+                 CREATE TRIGGER fitness_search_delete AFTER DELETE ON fitness
+                 BEGIN
+                     INSERT INTO fitness_search (fitness_search, rowid, description)
+                     VALUES ('delete', OLD.id, OLD.description);
+                 END
+                 """)
+    conn.execute("""
+                 CREATE TRIGGER fitness_search_update AFTER UPDATE OF description ON fitness
+                 BEGIN
+                     INSERT INTO fitness_search (fitness_search, rowid, description)
+                     VALUES ('delete', OLD.id, OLD.description);
+                     INSERT INTO fitness_search (rowid, description) VALUES (NEW.id, NEW.description);
+                 END
+                 """)
+
+
+def defer_search_deletes(conn):
+    # Batch deletes remove their rows from the index in one statement
+    # (repository.delete_many); a trigger call per row is ~50x slower
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'fitness_search'").fetchone():
+        return
+    conn.execute("DROP TRIGGER fitness_search_delete")
+    conn.execute("""
+                 CREATE TRIGGER fitness_search_delete AFTER DELETE ON fitness
+                 WHEN (SELECT deferred FROM rollup_state) = 0
+                 BEGIN
+                     INSERT INTO fitness_search (fitness_search, rowid, description)
+                     VALUES ('delete', OLD.id, OLD.description);
+                 END
+                 """)
+
+
+def add_workout_samples(conn):
+    # Per-workout time series packed by samples.pack_samples, keyed by fitness.id
+    conn.execute("""
+                 CREATE TABLE workout_samples (
+                     fitness_id INTEGER PRIMARY KEY,
+                     started INTEGER NOT NULL,
+                     count INTEGER NOT NULL,
+                     deltas BLOB NOT NULL,
+                     heart_rate BLOB,
+                     speed BLOB
+                 )
+                 """)
+    # Batch deletes drop samples in one statement (samples.delete_samples)
+    conn.execute("""
+                 CREATE TRIGGER fitness_samples_delete AFTER DELETE ON fitness
+                 WHEN (SELECT deferred FROM rollup_state) = 0
+                 BEGIN
+                     DELETE FROM workout_samples WHERE fitness_id = OLD.id;
+                 END
+                 """)
+
+
+# (user_version, step) pairs, applied in order; never edit a released step
+MIGRATIONS = [
+    (1, create_fitness_table),
+    (2, add_day_column),
+    (3, add_rollup_tables),
+    (4, normalize_amounts),
+    (5, add_description_search),
+    (6, defer_search_deletes),
+    (7, add_workout_samples),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate(db_path):
+    """Bring the database up to SCHEMA_VERSION, one transaction per step
+
+    Returns the list of versions that were applied.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    applied = []
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target, step in MIGRATIONS:
+            if target <= version:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                step(conn)
+                conn.execute(f"PRAGMA user_version = {target}")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            applied.append(target)
+    finally:
+        conn.close()
+    return applied
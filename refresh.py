@@ -0,0 +1,62 @@
+# Imports
+from collections import Counter
+
+from PyQt5.QtCore import QObject, QTimer
+
+import instrumentation
+
+
+class RefreshScheduler(QObject):
+    """Coalesce view refreshes into one flush per event-loop tick
+
+    Views are registered by name with the callback that redraws them.
+    Mutations call ``mark`` instead of refreshing directly; a zero-delay
+    timer then refreshes each marked view once, in registration order.
+    A view whose ``when`` returns False at flush time (a hidden chart, no
+    active search) is skipped, since showing it again renders it afresh.
+
+    ``counts`` keeps running totals: "marked" requests, "merged" duplicates,
+    "flushes", and "refreshed <view>" / "skipped <view>" per view.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.views = {}
+        self.dirty = set()
+        self.counts = Counter()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.flush)
+
+    def register(self, name, callback, when=None):
+        self.views[name] = (callback, when)
+
+    def mark(self, *names):
+        """Refresh the named views on the next tick"""
+        for name in names:
+            if name not in self.views:
+                raise KeyError(f"unknown view {name!r}")
+            self.counts["marked"] += 1
+            if name in self.dirty:
+                self.counts["merged"] += 1
+            self.dirty.add(name)
+        if self.dirty and not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        """Refresh every marked view now"""
+        self.timer.stop()
+        dirty, self.dirty = self.dirty, set()
+        if not dirty:
+            return
+
+        self.counts["flushes"] += 1
+        for name, (callback, when) in self.views.items():
+            if name not in dirty:
+                continue
+            if when is not None and not when():
+                self.counts[f"skipped {name}"] += 1
+                continue
+            self.counts[f"refreshed {name}"] += 1
+            instrumentation.call(f"refresh {name}", callback)
@@ -0,0 +1,118 @@
+# Imports
+import threading
+from collections import OrderedDict
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtGui import QColor, QImage, QPainter
+from PyQt5.QtWidgets import QWidget
+
+from charts import CHART_THEMES, LoadChart, PerformanceChart, PeriodChart
+
+
+class ChartRenderer:
+    """The chart card's charts, drawn with Agg on worker threads
+
+    Holds the scatter, period and load charts, each on its own figure so
+    one chart's layout never leaks into another's, and turns a scene into
+    a QImage: ``scene`` is (kind, data) with kind "scatter" (prepare_chart
+    output), "period" ((totals, period)) or "load" (load_series output).
+    Only render touches matplotlib, under a lock, so the GUI thread never
+    waits for a draw; a render that has been superseded finishes and its
+    image is dropped.
+    """
+
+    DPI = 100
+
+    def __init__(self, dark=False):
+        self.lock = threading.Lock()
+        self.dark = dark
+        self.charts = {}
+        for kind, chart_type in (("scatter", PerformanceChart), ("period", PeriodChart), ("load", LoadChart)):
+            figure = Figure(figsize=(8, 5), dpi=self.DPI)
+            FigureCanvasAgg(figure)
+            self.charts[kind] = chart_type(figure, dark)
+        self.sizes = {}
+
+    def render(self, scene, dark, width, height, ratio=1.0):
+        """QImage of ``scene`` for a ``width`` x ``height`` widget at device pixel ``ratio``"""
+        kind, data = scene
+        with self.lock:
+            if dark != self.dark:
+                self.dark = dark
+                for chart in self.charts.values():
+                    chart.apply_theme(dark)
+
+            chart = self.charts[kind]
+            figure = chart.figure
+            figure.set_dpi(self.DPI * ratio)
+            figure.set_size_inches(width / self.DPI, height / self.DPI)
+            if kind == "period":
+                chart.show(*data)
+            else:
+                chart.show(data)
+            # Period and load charts lay themselves out; the scatter only on a new size
+            size = (width, height, ratio)
+            if kind == "scatter" and self.sizes.get(kind) != size:
+                figure.tight_layout()
+            self.sizes[kind] = size
+
+            canvas = figure.canvas
+            canvas.draw()
+            pixels_wide, pixels_high = canvas.get_width_height(physical=True)
+            # The copy owns its pixels, so the QImage outlives the Agg buffer
+            image = QImage(canvas.buffer_rgba(), pixels_wide, pixels_high, QImage.Format_RGBA8888).copy()
+        image.setDevicePixelRatio(ratio)
+        return image
+
+
+class PixmapCache:
+    """Least recently used rendered charts, keyed on scene, theme and size"""
+
+    def __init__(self, capacity=16):
+        self.capacity = capacity
+        self.pixmaps = OrderedDict()
+
+    def get(self, key):
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            self.pixmaps.move_to_end(key)
+        return pixmap
+
+    def put(self, key, pixmap):
+        self.pixmaps[key] = pixmap
+        self.pixmaps.move_to_end(key)
+        while len(self.pixmaps) > self.capacity:
+            self.pixmaps.popitem(last=False)
+
+
+class ChartView(QWidget):
+    """Shows a rendered chart pixmap, stretched until a render for a new size arrives"""
+
+    resized = pyqtSignal()
+
+    def __init__(self, dark=False, parent=None):
+        super().__init__(parent)
+        self.pixmap = None
+        self.background = QColor(CHART_THEMES[dark]["background"])
+
+    def set_pixmap(self, pixmap):
+        self.pixmap = pixmap
+        self.update()
+
+    def set_theme(self, dark):
+        self.background = QColor(CHART_THEMES[dark]["background"])
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        if self.pixmap is None:
+            painter.fillRect(self.rect(), self.background)
+            return
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        painter.drawPixmap(self.rect(), self.pixmap)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.resized.emit()
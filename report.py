@@ -0,0 +1,151 @@
+"""Headless stats and chart reports for many FitTrack databases
+
+Usage: python report.py DB [DB ...] [--out reports] [--workers N] [--dark] [--migrate]
+
+Each database gets <out>/<name>/stats.json plus scatter.png, week.png,
+month.png and year.png rendered with the Agg backend. Databases are opened
+read-only and processed in parallel in a process pool; one row per
+database is written to <out>/summary.csv. A database older than the
+current schema is reported as failed unless --migrate is given, which
+migrates it first. Exits with status 1 if any database failed.
+"""
+# Imports
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from urllib.request import pathname2url
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from charts import PerformanceChart, PeriodChart
+from migrations import SCHEMA_VERSION, migrate
+from repository import summarize
+from rollups import PERIODS, read_rollup
+from workout_cache import read_columns, valid_points
+
+
+SUMMARY_FIELDS = ["database", "workouts", "calories", "distance", "first_date", "last_date",
+                  "busiest_week", "busiest_week_workouts", "calories_per_workout", "seconds", "error"]
+
+
+def render(chart_class, path, dark, draw):
+    """Draw one chart on its own Agg figure and save it as a PNG"""
+    figure = Figure(figsize=(8, 5))
+    FigureCanvasAgg(figure)
+    chart = chart_class(figure, dark)
+    draw(chart)
+    figure.savefig(path, dpi=100, facecolor=figure.get_facecolor())
+
+
+def open_read_only(db_path):
+    """Connect to a database without writing to it (works on read-only mounts)
+
+    Raises ValueError if it has not been migrated to the current schema.
+    """
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"no such database: {db_path}")
+    uri = f"file:{pathname2url(os.path.abspath(db_path))}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+    except sqlite3.OperationalError:
+        # A WAL database on a read-only mount cannot create its -shm file;
+        # nothing can change it there, so read it as immutable
+        conn.close()
+        conn = sqlite3.connect(uri + "&immutable=1", uri=True)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < SCHEMA_VERSION:
+        conn.close()
+        raise ValueError(f"schema version {version}, expected {SCHEMA_VERSION}; "
+                         "open it in FitTrack or run with --migrate")
+    return conn
+
+
+def report_database(db_path, out_dir, dark=False, migrate_first=False):
+    """Write stats.json and the chart PNGs for one database; returns the stats"""
+    start = time.perf_counter()
+    if migrate_first:
+        migrate(db_path)
+    conn = open_read_only(db_path)
+    try:
+        columns = read_columns(conn)
+        rollups = {period: read_rollup(conn, period) for period in PERIODS}
+    finally:
+        conn.close()
+
+    os.makedirs(out_dir, exist_ok=True)
+    stats = summarize(columns)
+    with open(os.path.join(out_dir, "stats.json"), "w") as handle:
+        json.dump(stats, handle, indent=2)
+
+    if columns:
+        distances, calories = valid_points(columns["distance"], columns["calories"])
+        if len(distances):
+            render(PerformanceChart, os.path.join(out_dir, "scatter.png"), dark,
+                   lambda chart: chart.show(chart.prepare(distances, calories)))
+    for period, totals in rollups.items():
+        render(PeriodChart, os.path.join(out_dir, f"{period}.png"), dark,
+               lambda chart: chart.show(totals, period))
+
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+def report_name(db_path, used):
+    """Output folder name for a database, unique within one run"""
+    name = os.path.splitext(os.path.basename(db_path))[0]
+    candidate, suffix = name, 2
+    while candidate in used:
+        candidate, suffix = f"{name}-{suffix}", suffix + 1
+    used.add(candidate)
+    return candidate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write stats and chart PNGs for FitTrack databases")
+    parser.add_argument("databases", nargs="+", help="fitness.db files to report on")
+    parser.add_argument("--out", default="reports", help="output directory (default: reports)")
+    parser.add_argument("--workers", type=int, default=None, help="processes to use (default: CPU count)")
+    parser.add_argument("--dark", action="store_true", help="render charts with the dark theme")
+    parser.add_argument("--migrate", action="store_true",
+                        help="migrate databases older than the current schema instead of failing them")
+    args = parser.parse_args()
+
+    used = set()
+    jobs = {db_path: os.path.join(args.out, report_name(db_path, used)) for db_path in args.databases}
+    rows = []
+    failed = 0
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(report_database, db_path, out_dir, args.dark, args.migrate): db_path
+                   for db_path, out_dir in jobs.items()}
+        for future in as_completed(futures):
+            db_path = futures[future]
+            try:
+                stats = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"FAILED {db_path}: {e}", file=sys.stderr)
+                rows.append({"database": db_path, "error": str(e)})
+                continue
+            print(f"{db_path}: {stats['workouts']:,} workouts in {stats['seconds']:.2f} s")
+            rows.append(dict(stats, database=db_path, error=""))
+
+    os.makedirs(args.out, exist_ok=True)
+    with open(os.path.join(args.out, "summary.csv"), "w", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=SUMMARY_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(sorted(rows, key=lambda row: row["database"]))
+
+    print(f"{len(rows) - failed} of {len(rows)} databases reported to {args.out}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
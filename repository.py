@@ -0,0 +1,166 @@
+# Imports
+import re
+import sqlite3
+
+import numpy as np
+
+from migrations import migrate
+from rollups import defer_rollups, period_keys, period_starts, read_rollup, resume_rollups, subtract_rollups
+from samples import delete_samples
+from workout_cache import MISSING_DAY, clean_number, read_columns
+
+
+def parse_amount(value):
+    """A calories/distance entry ("1,050", " 300", 300) as a float, or None if invalid"""
+    number = clean_number(value)
+    return float(number) if np.isfinite(number) and number >= 0 else None
+
+
+def search_terms(text):
+    """Words of a search box entry, lower-cased, without FTS syntax"""
+    return re.findall(r"\w+", text.lower())
+
+
+def has_search_index(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'fitness_search'"
+    ).fetchone() is not None
+
+
+def search_ids(conn, text):
+    """Ids of workouts whose description has every word of ``text`` as a prefix
+
+    Uses the FTS5 index; a database without one is scanned with LIKE.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return np.empty(0, dtype=np.int64)
+
+    # One space-separated string parses far faster than a Python row per match
+    if has_search_index(conn):
+        query = " ".join(f'"{term}"*' for term in terms)
+        row = conn.execute("SELECT group_concat(rowid, ' ') FROM fitness_search WHERE fitness_search MATCH ?",
+                           (query,)).fetchone()
+    else:
+        where = " AND ".join("description LIKE ?" for _ in terms)
+        row = conn.execute(f"SELECT group_concat(id, ' ') FROM fitness WHERE {where}",
+                           [f"%{term}%" for term in terms]).fetchone()
+    if not row[0]:
+        return np.empty(0, dtype=np.int64)
+    return np.fromstring(row[0], dtype=np.int64, sep=" ")
+
+
+def catch_up_search(conn, first_id):
+    """Index descriptions of rows with ``id >= first_id`` written while deferred"""
+    if has_search_index(conn):
+        conn.execute("""
+                     INSERT INTO fitness_search (rowid, description)
+                     SELECT id, description FROM fitness WHERE id >= ?
+                     """, (first_id,))
+
+
+def unindex_search(conn, row_filter):
+    """Drop the fitness rows matching ``row_filter`` from the index; call before deleting them"""
+    if has_search_index(conn):
+        conn.execute(f"""
+                     INSERT INTO fitness_search (fitness_search, rowid, description)
+                     SELECT 'delete', id, description FROM fitness WHERE {row_filter}
+                     """)
+
+
+class WorkoutRepository:
+    """Workouts in one fitness database, on plain sqlite3 (no Qt)
+
+    Opening migrates the database to the current schema. The connection
+    belongs to the thread that opened it; background readers use their own
+    (see workers.thread_connection).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        migrate(db_path)
+        self.conn = sqlite3.connect(db_path)
+
+    def close(self):
+        self.conn.close()
+
+    def add(self, date, calories, distance, description):
+        """Insert a workout and return its id
+
+        Amounts are stored as REAL; ValueError if either is not a number.
+        """
+        calories, distance = parse_amount(calories), parse_amount(distance)
+        if calories is None or distance is None:
+            raise ValueError("calories and distance must be numbers")
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO fitness (date, calories, distance, description) VALUES (?, ?, ?, ?)",
+                (date, calories, distance, description),
+            )
+        return cursor.lastrowid
+
+    def delete(self, fit_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM fitness WHERE id = ?", (fit_id,))
+
+    def delete_many(self, ids):
+        """Delete every workout in ``ids`` in one transaction
+
+        The ids go through a temp table rather than one statement per id, and
+        the rollups, search index and samples are updated in grouped statements
+        instead of by the per-row triggers.
+        """
+        doomed = "id IN (SELECT id FROM temp.doomed)"
+        with self.conn:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS doomed (id INTEGER PRIMARY KEY)")
+            self.conn.execute("DELETE FROM temp.doomed")
+            self.conn.executemany("INSERT OR IGNORE INTO temp.doomed (id) VALUES (?)",
+                                  ((int(fit_id),) for fit_id in ids))
+            defer_rollups(self.conn)
+            subtract_rollups(self.conn, doomed)
+            unindex_search(self.conn, doomed)
+            delete_samples(self.conn, doomed)
+            self.conn.execute(f"DELETE FROM fitness WHERE {doomed}")
+            resume_rollups(self.conn)
+
+    def columns(self):
+        """Every workout as numpy columns in history order, or None if there are none"""
+        return read_columns(self.conn)
+
+    def search(self, text):
+        """Ids of workouts matching a search box entry (see search_ids)"""
+        return search_ids(self.conn, text)
+
+    def rollup(self, period):
+        """All-time per-period totals from the rollup tables"""
+        return read_rollup(self.conn, period)
+
+
+def summarize(columns):
+    """Headline stats for read_columns output (None for no workouts), as plain values"""
+    if columns:
+        days, calories, distance = columns["days"], columns["calories"], columns["distance"]
+    else:
+        days, calories, distance = np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+    dated = days[days != MISSING_DAY]
+
+    stats = {
+        "workouts": int(len(days)),
+        "calories": float(np.nansum(calories)),
+        "distance": float(np.nansum(distance)),
+        "first_date": None,
+        "last_date": None,
+        "busiest_week": None,
+        "busiest_week_workouts": 0,
+        "calories_per_workout": 0.0,
+    }
+    if len(days):
+        stats["calories_per_workout"] = stats["calories"] / len(days)
+    if len(dated):
+        stats["first_date"] = str(dated.min().astype("datetime64[D]"))
+        stats["last_date"] = str(dated.max().astype("datetime64[D]"))
+        weeks, counts = np.unique(period_keys(dated, "week"), return_counts=True)
+        busiest = int(np.argmax(counts))
+        stats["busiest_week"] = str(period_starts(weeks[busiest:busiest + 1], "week")[0])
+        stats["busiest_week_workouts"] = int(counts[busiest])
+    return stats
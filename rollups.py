@@ -0,0 +1,125 @@
+# Imports
+import numpy as np
+
+from migrations import ROLLUP_PERIODS
+from workout_cache import MISSING_DAY, clean_numbers
+
+
+PERIODS = tuple(ROLLUP_PERIODS)
+
+
+def defer_rollups(conn):
+    """Pause the per-row rollup and search-index insert triggers for this transaction
+
+    Must be paired with catch_up_rollups (and repository.catch_up_search),
+    or resume_rollups after a batch delete, before the transaction commits.
+    """
+    conn.execute("UPDATE rollup_state SET deferred = 1")
+
+
+def catch_up_rollups(conn, days, calories, distance):
+    """Add rows written while deferred to every rollup and resume the triggers
+
+    ``days`` holds each row's day number (MISSING_DAY when it has none);
+    the totals are grouped here so each period is upserted once.
+    """
+    _upsert_totals(conn, days, calories, distance, 1)
+    resume_rollups(conn)
+
+
+def subtract_rollups(conn, row_filter):
+    """Take the fitness rows matching ``row_filter`` out of every rollup
+
+    Call while deferred and before deleting the rows; like catch_up_rollups
+    the rows are grouped in numpy, not re-keyed in SQL per period.
+    """
+    rows = conn.execute(f"SELECT IFNULL(day, ?), calories, distance FROM fitness WHERE {row_filter}",
+                        (MISSING_DAY,)).fetchall()
+    if not rows:
+        return
+    days, calories, distance = zip(*rows)
+    _upsert_totals(conn, np.array(days, dtype=np.int64), np.nan_to_num(clean_numbers(calories)),
+                   np.nan_to_num(clean_numbers(distance)), -1)
+    for period in PERIODS:
+        conn.execute(f"DELETE FROM rollup_{period} WHERE workouts <= 0")
+
+
+def _upsert_totals(conn, days, calories, distance, sign):
+    valid = days != MISSING_DAY
+    days, calories, distance = days[valid], calories[valid], distance[valid]
+    for period in PERIODS:
+        keys, index = np.unique(period_keys(days, period), return_inverse=True)
+        rows = zip(keys.tolist(),
+                   (sign * np.bincount(index, minlength=len(keys))).tolist(),
+                   (sign * np.bincount(index, weights=calories, minlength=len(keys))).tolist(),
+                   (sign * np.bincount(index, weights=distance, minlength=len(keys))).tolist())
+        conn.executemany(f"""
+                         INSERT INTO rollup_{period} (period, workouts, calories, distance)
+                         VALUES (?, ?, ?, ?)
+                         ON CONFLICT (period) DO UPDATE SET
+                             workouts = workouts + excluded.workouts,
+                             calories = calories + excluded.calories,
+                             distance = distance + excluded.distance
+                         """, rows)
+
+
+def resume_rollups(conn):
+    conn.execute("UPDATE rollup_state SET deferred = 0")
+
+
+def period_keys(days, period):
+    """Rollup keys for day numbers, matching migrations.ROLLUP_PERIODS"""
+    if period == "week":
+        return days - (days + 3) % 7
+    if period == "month":
+        return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    return days.astype('datetime64[D]').astype('datetime64[Y]').astype(np.int64) + 1970
+
+
+def period_starts(keys, period):
+    """First day of each period as datetime64[D]"""
+    if period == "week":
+        return keys.astype('datetime64[D]')
+    if period == "month":
+        return keys.astype('datetime64[M]').astype('datetime64[D]')
+    return (keys - 1970).astype('datetime64[Y]').astype('datetime64[D]')
+
+
+def dense_totals(keys, workouts, calories, distance, period):
+    """Spread per-period totals over every period between the first and last key"""
+    # Week keys are Mondays, seven days apart; number them consecutively first
+    ordinals = (keys - 4) // 7 if period == "week" else keys
+    if not len(ordinals):
+        empty = np.empty(0)
+        return {"periods": np.empty(0, dtype=np.int64), "workouts": empty,
+                "calories": empty, "distance": empty}
+
+    first = int(ordinals.min())
+    index = ordinals - first
+    size = int(index.max()) + 1
+    periods = np.arange(first, first + size, dtype=np.int64)
+    totals = {"periods": periods * 7 + 4 if period == "week" else periods}
+    for name, values in (("workouts", workouts), ("calories", calories), ("distance", distance)):
+        totals[name] = np.bincount(index, weights=values, minlength=size)
+    return totals
+
+
+def bucket_totals(days, calories, distance, period):
+    """Vectorized per-period totals for an ad-hoc set of workouts"""
+    valid = days != MISSING_DAY
+    keys = period_keys(days[valid], period)
+    return dense_totals(keys, np.ones(len(keys)), np.nan_to_num(calories[valid]),
+                        np.nan_to_num(distance[valid]), period)
+
+
+def read_rollup(conn, period):
+    """All-time per-period totals from the rollup table (no scan of fitness)"""
+    rows = conn.execute(
+        f"SELECT period, workouts, calories, distance FROM rollup_{period} ORDER BY period"
+    ).fetchall()
+    if not rows:
+        return dense_totals(np.empty(0, dtype=np.int64), None, None, None, period)
+
+    keys, workouts, calories, distance = (np.array(column) for column in zip(*rows))
+    return dense_totals(keys.astype(np.int64), workouts.astype(np.float64),
+                        calories.astype(np.float64), distance.astype(np.float64), period)
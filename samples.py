@@ -0,0 +1,103 @@
+# Imports
+import numpy as np
+
+
+# Stored type of each sample channel; int channels store 0 for no reading
+CHANNELS = {"heart_rate": "<i2", "speed": "<f4"}
+
+# Milliseconds between consecutive samples
+DELTA_TYPE = "<u4"
+
+INSERT_SQL = ("INSERT OR REPLACE INTO workout_samples (fitness_id, started, count, deltas, heart_rate, speed)"
+              " VALUES (?, ?, ?, ?, ?, ?)")
+
+
+def pack_samples(times, heart_rate=None, speed=None):
+    """Pack a workout's time series into a workout_samples row (without its id)
+
+    ``times`` are seconds since the epoch. They are stored as the first
+    timestamp in milliseconds plus uint32 deltas, and each channel as one
+    little-endian blob of its CHANNELS type, so 1 Hz heart rate and speed
+    cost 10 bytes a sample. Returns (started, count, deltas, heart_rate, speed).
+    """
+    stamps = np.maximum.accumulate(np.round(np.asarray(times, dtype=np.float64) * 1000).astype(np.int64))
+    deltas = np.diff(stamps).astype(DELTA_TYPE).tobytes()
+    blobs = []
+    for name, values in (("heart_rate", heart_rate), ("speed", speed)):
+        if values is None:
+            blobs.append(None)
+            continue
+        values = np.asarray(values, dtype=np.float64)
+        if CHANNELS[name].startswith("<i"):
+            values = np.nan_to_num(np.round(values))
+        blobs.append(values.astype(CHANNELS[name]).tobytes())
+    return (int(stamps[0]), len(stamps), deltas, *blobs)
+
+
+def unpack_samples(row):
+    """Columns of a packed (started, count, deltas, heart_rate, speed) row
+
+    ``elapsed`` is seconds from the first sample; missing readings are NaN.
+    """
+    started, count, deltas, *blobs = row
+    elapsed = np.zeros(count)
+    np.cumsum(np.frombuffer(deltas, dtype=DELTA_TYPE), out=elapsed[1:])
+    samples = {"started": started / 1000, "elapsed": elapsed / 1000}
+    for (name, stored), blob in zip(CHANNELS.items(), blobs):
+        if blob is None:
+            continue
+        values = np.frombuffer(blob, dtype=stored).astype(np.float64)
+        if stored.startswith("<i"):
+            values[values == 0] = np.nan
+        samples[name] = values
+    return samples
+
+
+def store_samples(conn, first_id, packed):
+    """Insert packed samples for rows ``first_id``, ``first_id + 1``, ...; None entries are skipped"""
+    conn.executemany(INSERT_SQL, ((first_id + index, *row) for index, row in enumerate(packed) if row is not None))
+
+
+def delete_samples(conn, row_filter):
+    """Drop the samples of the fitness rows matching ``row_filter``; call before deleting them"""
+    conn.execute(f"DELETE FROM workout_samples WHERE fitness_id IN (SELECT id FROM fitness WHERE {row_filter})")
+
+
+def read_samples(conn, fit_id):
+    """Unpacked samples of one workout, or None if it has none"""
+    row = conn.execute("SELECT started, count, deltas, heart_rate, speed FROM workout_samples WHERE fitness_id = ?",
+                       (fit_id,)).fetchone()
+    return unpack_samples(row) if row else None
+
+
+def minmax_downsample(x, y, width):
+    """Indexes of the lowest and highest ``y`` in each of ``width`` equal ``x`` buckets
+
+    Drawing only these points gives the same vertical extent in every pixel
+    column as drawing all of them, so a line of any length costs about
+    2 x ``width`` points. ``x`` must be ascending; NaN ``y`` are dropped.
+    """
+    finite = np.flatnonzero(np.isfinite(y))
+    if len(finite) <= 2 * width:
+        return finite
+    x, y = x[finite], y[finite]
+
+    span = (x[-1] - x[0]) or 1.0
+    buckets = np.minimum(((x - x[0]) * (width / span)).astype(np.intp), width - 1)
+    starts = np.flatnonzero(np.diff(buckets, prepend=-1))
+    sizes = np.diff(starts, append=len(y))
+    position = np.arange(len(y))
+    lowest = np.minimum.reduceat(np.where(y == np.repeat(np.minimum.reduceat(y, starts), sizes), position, len(y)),
+                                 starts)
+    highest = np.minimum.reduceat(np.where(y == np.repeat(np.maximum.reduceat(y, starts), sizes), position, len(y)),
+                                  starts)
+    return finite[np.unique(np.concatenate((lowest, highest)))]
+
+
+def detail_samples(conn, fit_id, width):
+    """read_samples plus each channel's minmax_downsample indexes for a ``width``-pixel plot"""
+    samples = read_samples(conn, fit_id)
+    if samples is not None:
+        samples["shown"] = {name: minmax_downsample(samples["elapsed"], samples[name], width)
+                            for name in CHANNELS if name in samples}
+    return samples
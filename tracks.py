@@ -0,0 +1,312 @@
+# Imports
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from xml.etree.ElementTree import ParseError, iterparse
+
+import numpy as np
+
+from importer import day_of, import_csv, insert_rows, open_bulk_connection, parse_date, parse_number
+from samples import pack_samples
+
+
+TRACK_EXTENSIONS = (".gpx", ".tcx")
+
+# Mean Earth radius (IUGG), and metres per yard for fitness.distance
+EARTH_RADIUS_M = 6_371_008.8
+METERS_PER_YARD = 0.9144
+
+# Elements that start a new run of points; distance is not bridged across them
+SEGMENT_TAGS = {"trkseg", "Track"}
+POINT_TAGS = {"trkpt", "Trackpoint"}
+
+
+def _local(tag):
+    # "{http://www.topografix.com/GPX/1/1}trkpt" -> "trkpt"
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_timestamp(text, minutes):
+    """Seconds since the epoch for an ISO 8601 timestamp, or NaN
+
+    Points share their date, hour and minute with their neighbours, so the
+    epoch of each "yyyy-mm-ddThh:mm" prefix is memoized in ``minutes`` and
+    only the seconds are parsed per point. Times without a zone are UTC.
+    """
+    text = text.strip()
+    if len(text) >= 19 and text[16] == ":" and text[-1] == "Z":
+        base = minutes.get(text[:16])
+        if base is None:
+            base = minutes[text[:16]] = datetime.fromisoformat(text[:16]).replace(tzinfo=timezone.utc).timestamp()
+        try:
+            return base + float(text[17:-1])
+        except ValueError:
+            pass
+    try:
+        stamp = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return np.nan
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    return stamp.timestamp()
+
+
+def read_track(path):
+    """Stream a GPX or TCX file into point columns and activity details
+
+    Only one track point is held as XML at a time: each is cleared once
+    read, and its segment is emptied, so a 100 MB file costs its point
+    columns (26 bytes a point) rather than its element tree. Returns a dict
+    with per-point ``lat``/``lon`` (degrees), ``time`` (epoch seconds) and
+    ``heart_rate`` (0 for none) arrays, NaN where a point lacks a value;
+    ``breaks`` (indexes that start a segment); the first timestamp
+    ``started``; ``name``, ``sport``, and the lap ``calories``/``lap_meters``
+    totals TCX files carry (None for GPX).
+    """
+    lat, lon, times, heart_rate, breaks = array("d"), array("d"), array("d"), array("h"), []
+    track = {"started": None, "name": None, "sport": None, "calories": None, "lap_meters": None}
+    point = {}
+    minutes = {}
+    segment = None
+    depth = []
+
+    for event, elem in iterparse(path, events=("start", "end")):
+        tag = _local(elem.tag)
+        if event == "start":
+            depth.append(tag)
+            if tag in SEGMENT_TAGS:
+                segment = elem
+                breaks.append(len(lat))
+            elif tag == "trkpt":
+                point = {"lat": elem.get("lat"), "lon": elem.get("lon")}
+            elif tag == "Trackpoint":
+                point = {}
+            elif tag == "Activity":
+                track["sport"] = elem.get("Sport")
+            continue
+
+        depth.pop()
+        parent = depth[-1] if depth else None
+        if tag in POINT_TAGS:
+            has_position = point.get("lat") is not None and point.get("lon") is not None
+            lat.append(float(point["lat"]) if has_position else np.nan)
+            lon.append(float(point["lon"]) if has_position else np.nan)
+            times.append(parse_timestamp(point["time"], minutes) if "time" in point else np.nan)
+            heart_rate.append(min(int(parse_number(point.get("hr")) or 0), 32767))
+            elem.clear()
+            if segment is not None:
+                segment.clear()
+        elif tag == "LatitudeDegrees":
+            point["lat"] = elem.text
+        elif tag == "LongitudeDegrees":
+            point["lon"] = elem.text
+        elif tag in ("time", "Time") and elem.text:
+            if parent in POINT_TAGS:
+                point["time"] = elem.text
+            if track["started"] is None:
+                track["started"] = elem.text
+        elif tag == "hr" or (tag == "Value" and parent == "HeartRateBpm"):
+            point["hr"] = elem.text
+        elif tag == "Id" and parent == "Activity" and track["started"] is None and elem.text:
+            track["started"] = elem.text
+        elif tag == "name" and parent == "trk" and elem.text:
+            track["name"] = elem.text.strip()
+        elif tag == "type" and parent == "trk" and elem.text and track["sport"] is None:
+            track["sport"] = elem.text.strip()
+        elif tag == "Calories" and parent == "Lap":
+            track["calories"] = (track["calories"] or 0.0) + (parse_number(elem.text) or 0.0)
+        elif tag == "DistanceMeters" and parent == "Lap":
+            track["lap_meters"] = (track["lap_meters"] or 0.0) + (parse_number(elem.text) or 0.0)
+
+    track["lat"] = np.frombuffer(lat, dtype=np.float64)
+    track["lon"] = np.frombuffer(lon, dtype=np.float64)
+    track["time"] = np.frombuffer(times, dtype=np.float64)
+    track["heart_rate"] = np.frombuffer(heart_rate, dtype=np.int16)
+    track["breaks"] = np.array(breaks, dtype=np.intp)
+    return track
+
+
+def haversine_legs(lat, lon):
+    """Great-circle distance in metres from each point to the next"""
+    phi, lam = np.radians(lat), np.radians(lon)
+    a = (np.sin(np.diff(phi) / 2) ** 2
+         + np.cos(phi[:-1]) * np.cos(phi[1:]) * np.sin(np.diff(lam) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_meters(lat, lon, breaks=()):
+    """Great-circle length of a point sequence, skipping the gaps at ``breaks``"""
+    if len(lat) < 2:
+        return 0.0
+    legs = haversine_legs(lat, lon)
+    legs[_gap_legs(breaks, len(legs))] = 0.0
+    return float(legs.sum())
+
+
+def _gap_legs(breaks, legs):
+    # Leg i ends at point i + 1, so a segment starting at point b drops leg b - 1
+    gaps = np.asarray(breaks, dtype=np.intp) - 1
+    return gaps[(gaps >= 0) & (gaps < legs)]
+
+
+def track_samples(track):
+    """samples.pack_samples output for a read_track result, or None
+
+    Speed comes from the haversine legs over their time steps, so it is
+    NaN at points without a position and at the start of each segment.
+    """
+    timed = np.isfinite(track["time"])
+    heart_rate = track["heart_rate"].astype(np.float64)
+    heart_rate[heart_rate <= 0] = np.nan
+
+    speed = np.full(len(timed), np.nan)
+    positioned = np.flatnonzero(np.isfinite(track["lat"]) & np.isfinite(track["lon"]))
+    if len(positioned) >= 2:
+        legs = haversine_legs(track["lat"][positioned], track["lon"][positioned])
+        # A break at point b falls before the first positioned point at or after b
+        starts = np.searchsorted(positioned, track["breaks"])
+        legs[_gap_legs(starts, len(legs))] = np.nan
+        steps = np.diff(track["time"][positioned])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            speed[positioned[1:]] = np.where(steps > 0, legs / steps, np.nan)
+
+    if timed.sum() < 2 or not (np.isfinite(heart_rate[timed]).any() or np.isfinite(speed[timed]).any()):
+        return None
+    return pack_samples(track["time"][timed],
+                        heart_rate[timed] if np.isfinite(heart_rate[timed]).any() else None,
+                        speed[timed] if np.isfinite(speed[timed]).any() else None)
+
+
+def summarize_track(path):
+    """One workout row (date, calories, distance, description) and its packed samples
+
+    Distance is the GPS path in yards, or the lap distance for files with
+    no positions (pool swims, treadmills). Calories are None unless the file
+    records them. Samples are None for files without timed heart rate or
+    speed. Raises ValueError when the file has no date or distance.
+    """
+    track = read_track(path)
+    date = parse_date(track["started"]) if track["started"] else None
+    if date is None:
+        raise ValueError("no timestamp")
+
+    positioned = np.isfinite(track["lat"]) & np.isfinite(track["lon"])
+    if positioned.sum() >= 2:
+        # Segment starts, renumbered to count positioned points only
+        starts = np.concatenate(([0], np.cumsum(positioned)))[track["breaks"]]
+        meters = haversine_meters(track["lat"][positioned], track["lon"][positioned], starts)
+    elif track["lap_meters"] is not None:
+        meters = track["lap_meters"]
+    else:
+        raise ValueError("no track points")
+
+    description = track["name"] or track["sport"] or os.path.splitext(os.path.basename(path))[0]
+    return (date, track["calories"], round(meters / METERS_PER_YARD, 1), description), track_samples(track)
+
+
+def _summarize(path):
+    # Pool worker entry point; a bad file is counted, not fatal to the batch
+    try:
+        return summarize_track(path)
+    except (ParseError, ValueError, OSError):
+        return None
+
+
+def _summarize_chunk(paths):
+    # One pool task per chunk keeps the pickling overhead per file low
+    return [_summarize(path) for path in paths]
+
+
+def track_files(folder):
+    """Every GPX/TCX file under ``folder``, sorted"""
+    paths = []
+    for root, _, names in os.walk(folder):
+        paths.extend(os.path.join(root, name) for name in names
+                     if name.lower().endswith(TRACK_EXTENSIONS))
+    return sorted(paths)
+
+
+def import_tracks(paths, db_path, batch_size=1_000, workers=None, progress=None):
+    """Parse track files in a process pool and insert their summaries and samples
+
+    Files are parsed in parallel (``workers`` processes, default one per
+    CPU; a single file is parsed in-process) and summaries are inserted
+    ``batch_size`` at a time with importer.insert_rows.
+    ``progress(done, total)`` is called with the number of files parsed.
+    Returns ``(imported, skipped)``.
+    """
+    paths = list(paths)
+    imported = skipped = 0
+    days = {}
+    rows, packed = [], []
+
+    def flush():
+        nonlocal imported
+        if rows:
+            insert_rows(conn, rows, packed)
+            imported += len(rows)
+            rows.clear()
+            packed.clear()
+
+    step = max(1, len(paths) // 200)
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    conn = open_bulk_connection(db_path)
+    try:
+        futures = []
+        if workers <= 1:
+            summaries = map(_summarize, paths)
+            pool = None
+        else:
+            # spawn, not fork: the caller is usually a thread of the Qt app
+            pool = ProcessPoolExecutor(workers, mp_context=get_context("spawn"))
+            chunk = max(1, len(paths) // (workers * 8))
+            futures = [pool.submit(_summarize_chunk, paths[i:i + chunk]) for i in range(0, len(paths), chunk)]
+            summaries = (summary for future in futures for summary in future.result())
+
+        try:
+            for done, summary in enumerate(summaries, 1):
+                # A date day_of rejects would disagree with the day trigger
+                # (see import_csv), so it is skipped like an unreadable file
+                day = None if summary is None else day_of(summary[0][0], days)
+                if day is None:
+                    skipped += 1
+                else:
+                    (date, calories, distance, description), samples = summary
+                    rows.append((date, calories, distance, description, day))
+                    packed.append(samples)
+                if len(rows) >= batch_size:
+                    flush()
+                if progress and done % step == 0:
+                    progress(done, len(paths))
+            flush()
+        finally:
+            if pool is not None:
+                # Drop chunks not yet started if the import failed part way
+                # (shutdown's cancel_futures needs Python 3.9)
+                for future in futures:
+                    future.cancel()
+                pool.shutdown()
+    finally:
+        conn.close()
+
+    if progress:
+        progress(len(paths), len(paths))
+    return imported, skipped
+
+
+def import_folder(folder, db_path, progress=None):
+    """import_tracks for every GPX/TCX file under ``folder``"""
+    return import_tracks(track_files(folder), db_path, progress=progress)
+
+
+def import_files(paths, db_path, progress=None):
+    """Import a mix of CSV exports and track files; returns ``(imported, skipped)``"""
+    tracks = [path for path in paths if path.lower().endswith(TRACK_EXTENSIONS)]
+    imported, skipped = import_tracks(tracks, db_path, progress=progress) if tracks else (0, 0)
+    for path in paths:
+        if path not in tracks:
+            added, rejected = import_csv(path, db_path, progress=progress)
+            imported, skipped = imported + added, skipped + rejected
+    return imported, skipped
@@ -0,0 +1,106 @@
+# Imports
+import numpy as np
+
+from workout_cache import MISSING_DAY
+
+
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+
+
+class TrainingLoad:
+    """Prefix sums of daily calories and distance over a dense day axis
+
+    ``prefix[:, i]`` is the total of the first ``i`` days from ``first_day``,
+    so the load of any window is one subtraction. Workouts are added or
+    removed by adding their per-day deltas to the prefix sums, which costs
+    O(days on the axis), never a pass over the history. Updates replace the
+    array, so a worker may keep reading an older snapshot.
+    """
+
+    def __init__(self):
+        self.first_day = 0
+        self.prefix = np.zeros((2, 1))
+
+    def days(self):
+        return self.prefix.shape[1] - 1
+
+    def load(self, days, calories, distance, today=None):
+        """Rebuild from whole history columns; the axis runs at least to ``today``"""
+        if today is None:
+            today = int(np.datetime64("today", "D").astype(np.int64))
+        days, calories, distance = self._valid(days, calories, distance)
+        self.first_day = int(days.min()) if len(days) else today
+        self.prefix = np.zeros((2, max(today, int(days.max()) if len(days) else today) - self.first_day + 2))
+        self.apply(days, calories, distance, 1)
+
+    def apply(self, days, calories, distance, sign):
+        """Add (sign 1) or remove (sign -1) workouts"""
+        days, calories, distance = self._valid(days, calories, distance)
+        if not len(days):
+            return
+        self._extend(int(days.min()), int(days.max()))
+        index = days - self.first_day
+        size = self.days()
+        delta = np.vstack((np.bincount(index, weights=calories, minlength=size),
+                           np.bincount(index, weights=distance, minlength=size)))
+        prefix = self.prefix.copy()
+        prefix[:, 1:] += sign * np.cumsum(delta, axis=1)
+        self.prefix = prefix
+
+    def window(self, last_day, width):
+        """Calories and distance in the ``width`` days ending on ``last_day``"""
+        end = int(np.clip(last_day - self.first_day + 1, 0, self.days()))
+        start = int(np.clip(last_day - width - self.first_day + 1, 0, self.days()))
+        return self.prefix[:, end] - self.prefix[:, start]
+
+    def rolling(self, first_day, last_day, width):
+        """(2, n) rolling ``width``-day totals for each day from first_day to last_day"""
+        ends = np.clip(np.arange(first_day, last_day + 1) - self.first_day + 1, 0, self.days())
+        starts = np.clip(ends - width, 0, None)
+        return self.prefix[:, ends] - self.prefix[:, starts]
+
+    def _extend(self, first_day, last_day):
+        before = max(self.first_day - first_day, 0)
+        after = max(last_day - (self.first_day + self.days() - 1), 0)
+        if before or after:
+            self.prefix = np.pad(self.prefix, ((0, 0), (before, after)), mode="edge")
+            self.prefix[:, :before + 1] = 0
+            self.first_day -= before
+
+    @staticmethod
+    def _valid(days, calories, distance):
+        days = np.asarray(days, dtype=np.int64)
+        valid = days != MISSING_DAY
+        return (days[valid], np.nan_to_num(np.asarray(calories, dtype=np.float64)[valid]),
+                np.nan_to_num(np.asarray(distance, dtype=np.float64)[valid]))
+
+
+def load_ratio(acute, chronic):
+    """Acute:chronic ratio: the last 7 days against the 28-day weekly average"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(chronic > 0, acute / (chronic * ACUTE_DAYS / CHRONIC_DAYS), np.nan)
+
+
+def load_summary(load, day):
+    """Acute and chronic calories and distance as of ``day``, with their ratios"""
+    acute = load.window(day, ACUTE_DAYS)
+    chronic = load.window(day, CHRONIC_DAYS)
+    ratio = load_ratio(acute, chronic)
+    return {
+        "acute_calories": float(acute[0]), "acute_distance": float(acute[1]),
+        "chronic_calories": float(chronic[0]), "chronic_distance": float(chronic[1]),
+        "calories_ratio": float(ratio[0]), "distance_ratio": float(ratio[1]),
+    }
+
+
+def load_series(load, first_day, last_day):
+    """Daily acute and chronic totals and ratios for a day range, for LoadChart"""
+    acute = load.rolling(first_day, last_day, ACUTE_DAYS)
+    chronic = load.rolling(first_day, last_day, CHRONIC_DAYS)
+    return {
+        "days": np.arange(first_day, last_day + 1),
+        "acute": acute,
+        "chronic": chronic,
+        "ratio": load_ratio(acute, chronic),
+    }
@@ -0,0 +1,102 @@
+# Imports
+import numpy as np
+
+
+# Two-sided 95% normal quantile; workout counts are far past where t differs
+Z_95 = 1.959964
+
+
+def binned_moments(x, y, bins):
+    """Per-bin count and sums of x, y, x², xy and y² over equal-width x bins
+
+    Everything below is computed from these, so fitting costs one pass over
+    the points and the rest scales with ``bins`` rather than with the data.
+    """
+    low, high = float(x.min()), float(x.max())
+    width = (high - low) / bins or 1.0
+    index = np.minimum(((x - low) / width).astype(np.intp), bins - 1)
+    moments = {"centers": low + (np.arange(bins) + 0.5) * width}
+    moments["n"] = np.bincount(index, minlength=bins).astype(np.float64)
+    for name, values in (("x", x), ("y", y), ("xx", x * x), ("xy", x * y), ("yy", y * y)):
+        moments[name] = np.bincount(index, weights=values, minlength=bins)
+    return moments
+
+
+def weighted_line(moments, weights):
+    """Weighted least-squares lines through the binned points, one per weight row
+
+    ``weights`` is (lines, bins) and applies to every point in a bin. Returns
+    intercepts, slopes, residual variances and effective point counts.
+    """
+    sw = weights @ moments["n"]
+    sx, sy = weights @ moments["x"], weights @ moments["y"]
+    sxx, sxy, syy = weights @ moments["xx"], weights @ moments["xy"], weights @ moments["yy"]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_x, mean_y = sx / sw, sy / sw
+        var_x = sxx / sw - mean_x ** 2
+        slope = np.where(var_x > 1e-12 * np.maximum(mean_x ** 2, 1.0),
+                         (sxy / sw - mean_x * mean_y) / var_x, 0.0)
+        intercept = mean_y - slope * mean_x
+        residual = (syy - 2 * intercept * sy - 2 * slope * sxy + intercept ** 2 * sw
+                    + 2 * intercept * slope * sx + slope ** 2 * sxx) / sw
+        effective = sw ** 2 / ((weights ** 2) @ moments["n"])
+    return intercept, slope, np.maximum(residual, 0.0), effective
+
+
+def fit_trends(x, y, grid_points=120, bins=400, frac=0.3, max_points=250_000):
+    """Least-squares line and LOWESS-style curve for a scatter, with 95% bands
+
+    The line is an exact fit with the usual confidence band for the mean.
+    The curve is local linear regression with tricube weights over the
+    nearest ``frac`` of the points, evaluated on ``grid_points`` x values;
+    weights are taken per x bin, so its band is an approximation. Above
+    ``max_points`` an evenly strided sample is fitted, and the bands are
+    those of the sample.
+    """
+    if len(x) > max_points:
+        step = -(-len(x) // max_points)
+        x, y = x[::step], y[::step]
+
+    moments = binned_moments(x, y, bins)
+    n = float(len(x))
+    grid = np.linspace(float(x.min()), float(x.max()), grid_points)
+
+    # Least-squares line
+    intercept, slope, residual, _ = weighted_line(moments, np.ones((1, bins)))
+    intercept, slope = float(intercept[0]), float(slope[0])
+    mean_x = moments["x"].sum() / n
+    sxx = moments["xx"].sum() - n * mean_x ** 2
+    spread = np.sqrt(residual[0] * n / max(n - 2, 1.0))
+    half_width = Z_95 * spread * np.sqrt(1 / n + (grid - mean_x) ** 2 / sxx) if sxx > 0 else 0.0
+    linear = intercept + slope * grid
+    total = moments["yy"].sum() - moments["y"].sum() ** 2 / n
+
+    # Bandwidth per grid point: the distance that takes in frac of the points
+    occupied = moments["n"] > 0
+    centers, counts = moments["centers"][occupied], moments["n"][occupied]
+    distance = np.abs(grid[:, None] - centers[None, :])
+    order = np.argsort(distance, axis=1)
+    reached = np.cumsum(np.take_along_axis(np.broadcast_to(counts, distance.shape), order, axis=1), axis=1)
+    nearest = np.minimum((reached < frac * n).sum(axis=1), len(centers) - 1)
+    bandwidth = np.take_along_axis(distance, order, axis=1)[np.arange(grid_points), nearest]
+    bandwidth = np.maximum(bandwidth, (grid[-1] - grid[0]) / bins) * 1.0001
+
+    weights = np.zeros((grid_points, bins))
+    weights[:, occupied] = np.clip(1 - (distance / bandwidth[:, None]) ** 3, 0, None) ** 3
+    local_intercept, local_slope, local_residual, effective = weighted_line(moments, weights)
+    smooth = local_intercept + local_slope * grid
+    smooth_half = Z_95 * np.sqrt(local_residual / effective)
+
+    return {
+        "grid": grid,
+        "slope": slope,
+        "intercept": intercept,
+        "r2": 1 - residual[0] * n / total if total > 0 else 0.0,
+        "linear": linear,
+        "linear_low": linear - half_width,
+        "linear_high": linear + half_width,
+        "smooth": smooth,
+        "smooth_low": smooth - smooth_half,
+        "smooth_high": smooth + smooth_half,
+    }
@@ -0,0 +1,158 @@
+# Imports
+import sqlite3
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+import instrumentation
+
+
+_local = threading.local()
+
+
+def thread_connection(db_path):
+    """SQLite connection owned by the calling worker thread"""
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_path)
+    if conn is None:
+        conn = connections[db_path] = sqlite3.connect(db_path)
+    return conn
+
+
+class TaskSignals(QObject):
+    """Signals a task emits from its worker thread (delivered queued)"""
+    finished = pyqtSignal(str, int, object)
+    failed = pyqtSignal(str, int, str)
+    progress = pyqtSignal(str, int, object, object)
+
+
+class Task(QRunnable):
+    """One unit of work submitted through a TaskRunner"""
+
+    def __init__(self, runner, channel, generation, fn, args, db_path, with_progress):
+        super().__init__()
+        self.runner = runner
+        self.channel = channel
+        self.generation = generation
+        self.fn = fn
+        self.args = args
+        self.db_path = db_path
+        self.with_progress = with_progress
+        self.signals = runner.signals
+
+    def report(self, done, total):
+        self.signals.progress.emit(self.channel, self.generation, done, total)
+
+    def run(self):
+        if self.runner.is_stale(self.channel, self.generation):
+            return
+
+        args = self.args
+        conn = None
+        if self.db_path is not None:
+            conn = thread_connection(self.db_path)
+            args = (conn,) + args
+        kwargs = {"progress": self.report} if self.with_progress else {}
+
+        self.runner.started(self.channel, self.generation, conn)
+        try:
+            result = instrumentation.call(f"task {self.channel}", self.fn, *args, **kwargs)
+        except Exception as e:
+            if not self.runner.is_stale(self.channel, self.generation):
+                self.signals.failed.emit(self.channel, self.generation, str(e))
+            return
+        finally:
+            self.runner.stopped(self.channel, self.generation)
+
+        self.signals.finished.emit(self.channel, self.generation, result)
+
+
+class TaskRunner(QObject):
+    """Run queries and number crunching on the thread pool
+
+    Work is submitted on a named channel. Submitting again on the same channel
+    supersedes the previous task: if it has not started it is skipped, a
+    running SQLite query is interrupted, and any result it still produces is
+    dropped. Callbacks are invoked on the GUI thread.
+    """
+
+    def __init__(self, db_path, parent=None, pool=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.pool = pool or QThreadPool.globalInstance()
+        self.signals = TaskSignals()
+        self.signals.finished.connect(self._on_finished)
+        self.signals.failed.connect(self._on_failed)
+        self.signals.progress.connect(self._on_progress)
+        self.lock = threading.Lock()
+        self.generations = {}
+        self.running = {}
+        self.callbacks = {}
+
+    def submit(self, channel, fn, *args, on_result, on_error=None, on_progress=None):
+        """Run ``fn(*args)`` on the pool; returns the task's generation"""
+        return self._start(channel, fn, args, None, on_result, on_error, on_progress)
+
+    def submit_query(self, channel, fn, *args, on_result, on_error=None, on_progress=None):
+        """Run ``fn(conn, *args)`` with the worker thread's own connection"""
+        return self._start(channel, fn, args, self.db_path, on_result, on_error, on_progress)
+
+    def _start(self, channel, fn, args, db_path, on_result, on_error, on_progress):
+        generation = self.cancel(channel)
+        self.callbacks[channel] = (on_result, on_error, on_progress)
+        self.pool.start(Task(self, channel, generation, fn, args, db_path, on_progress is not None))
+        return generation
+
+    def cancel(self, channel):
+        """Supersede whatever is queued or running on ``channel``"""
+        with self.lock:
+            generation = self.generations.get(channel, 0) + 1
+            self.generations[channel] = generation
+            running = self.running.pop(channel, None)
+        if running is not None and running[1] is not None:
+            running[1].interrupt()
+        return generation
+
+    def shutdown(self):
+        """Supersede every channel and wait for running tasks to return"""
+        for channel in list(self.generations):
+            self.cancel(channel)
+        self.pool.waitForDone()
+
+    def is_busy(self, channel):
+        with self.lock:
+            return channel in self.running
+
+    def is_stale(self, channel, generation):
+        with self.lock:
+            return self.generations.get(channel) != generation
+
+    def started(self, channel, generation, conn):
+        with self.lock:
+            if self.generations.get(channel) == generation:
+                self.running[channel] = (generation, conn)
+
+    def stopped(self, channel, generation):
+        with self.lock:
+            if self.running.get(channel, (None,))[0] == generation:
+                del self.running[channel]
+
+    def _on_finished(self, channel, generation, result):
+        if not self.is_stale(channel, generation):
+            self.callbacks[channel][0](result)
+
+    def _on_failed(self, channel, generation, message):
+        if self.is_stale(channel, generation):
+            return
+        on_error = self.callbacks[channel][1]
+        if on_error:
+            on_error(message)
+        else:
+            print(f"ERROR: {channel}: {message}")
+
+    def _on_progress(self, channel, generation, done, total):
+        on_progress = self.callbacks[channel][2]
+        if on_progress and not self.is_stale(channel, generation):
+            on_progress(done, total)
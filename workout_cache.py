@@ -0,0 +1,273 @@
+# Imports
+import sqlite3
+
+import numpy as np
+
+
+# Day number used for rows whose date cannot be parsed; sorts after every real date
+MISSING_DAY = -(2 ** 31)
+
+
+def clean_number(value):
+    """Convert a stored calories/distance value ("1,050", 300.0, None) to a float"""
+    if value is None or value == "":
+        return np.nan
+    try:
+        return float(str(value).replace(',', ''))
+    except (ValueError, TypeError):
+        return np.nan
+
+
+def clean_numbers(values):
+    """Vectorized clean_number for a whole column"""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (ValueError, TypeError):
+        return np.array([clean_number(value) for value in values], dtype=np.float64)
+
+
+def day_number(date):
+    """Days since 1970-01-01 for a yyyy-MM-dd string"""
+    try:
+        day = int(np.datetime64(date, 'D').astype(np.int64))
+    except (ValueError, TypeError):
+        return MISSING_DAY
+    return MISSING_DAY if day == np.iinfo(np.int64).min else day
+
+
+def valid_points(distance, calories):
+    """Drop pairs where either value is empty, zero or unparseable"""
+    valid = (np.isfinite(distance) & np.isfinite(calories)
+             & (distance != 0) & (calories != 0))
+    return distance[valid], calories[valid]
+
+
+def sort_keys(days, ids):
+    """Ascending keys for the history order (date DESC, id DESC)"""
+    return -(np.asarray(days, dtype=np.int64) * (1 << 32) + np.asarray(ids, dtype=np.int64))
+
+
+def read_columns(conn, fetch_size=100_000):
+    """Read the fitness table into history-ordered column arrays
+
+    Uses the migrated ``day`` column, so dates are never parsed here. Safe to
+    call from a worker thread with that thread's own connection.
+    """
+    ids, days, calories, distance, codes = [], [], [], [], []
+    desc_index = {}
+
+    cursor = conn.execute(
+        "SELECT id, IFNULL(day, ?), calories, distance, description FROM fitness",
+        (MISSING_DAY,))
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            break
+        chunk_ids, chunk_days, chunk_cal, chunk_dist, chunk_desc = zip(*rows)
+        ids.append(np.array(chunk_ids, dtype=np.int64))
+        days.append(np.array(chunk_days, dtype=np.int64))
+        calories.append(clean_numbers(chunk_cal))
+        distance.append(clean_numbers(chunk_dist))
+        codes.append(np.array([desc_index.setdefault(desc or "", len(desc_index))
+                               for desc in chunk_desc], dtype=np.int32))
+
+    if not ids:
+        return None
+
+    ids = np.concatenate(ids)
+    days = np.concatenate(days)
+    keys = sort_keys(days, ids)
+    order = np.argsort(keys, kind='stable')
+    return {
+        "ids": ids[order],
+        "days": days[order],
+        "calories": np.concatenate(calories)[order],
+        "distance": np.concatenate(distance)[order],
+        "desc_codes": np.concatenate(codes)[order],
+        "keys": keys[order],
+        "descriptions": list(desc_index),
+    }
+
+
+class WorkoutCache:
+    """Columnar in-memory copy of the fitness table
+
+    Rows are kept in history order (newest date first, then newest id) so the
+    table can index straight into the arrays. Calories and distance are
+    cleaned once on load; unparseable values are NaN. Mutations replace the
+    arrays rather than writing into them, so a worker may keep reading a
+    snapshot while the GUI thread edits, and ``version`` counts every change.
+    """
+
+    FETCH_SIZE = 100_000
+
+    def __init__(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.days = np.empty(0, dtype=np.int64)
+        self.calories = np.empty(0, dtype=np.float64)
+        self.distance = np.empty(0, dtype=np.float64)
+        self.desc_codes = np.empty(0, dtype=np.int32)
+        self.keys = np.empty(0, dtype=np.int64)
+        self.descriptions = []
+        self.desc_index = {}
+        self.totals = [0, 0.0, 0.0]
+        self.first_day = None
+        self.last_day = None
+        self.start = 0
+        self.stop = 0
+        self.version = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def load(self, db_path):
+        """Read the whole fitness table into the column arrays"""
+        conn = sqlite3.connect(db_path)
+        try:
+            self.set_columns(read_columns(conn, self.FETCH_SIZE))
+        finally:
+            conn.close()
+
+    def set_columns(self, columns):
+        """Replace the cached rows with arrays from read_columns"""
+        first_day, last_day, version = self.first_day, self.last_day, self.version
+        self.__init__()
+        if columns:
+            for name in ("ids", "days", "calories", "distance", "desc_codes", "keys"):
+                setattr(self, name, columns[name])
+            self.descriptions = columns["descriptions"]
+            self.desc_index = {desc: code for code, desc in enumerate(self.descriptions)}
+        self.version = version + 1
+        self.set_window(first_day, last_day)
+
+    def set_window(self, first_day=None, last_day=None):
+        """Limit rows, totals and chart points to a day range (None = open ended)
+
+        Rows are sorted by day, so the window is found by binary search on the
+        sort keys rather than by filtering rows.
+        """
+        self.first_day = first_day
+        self.last_day = last_day
+        self.start = 0 if last_day is None else int(
+            np.searchsorted(self.keys, -(last_day + 1) * (1 << 32), side='right'))
+        self.stop = len(self.keys) if first_day is None else int(
+            np.searchsorted(self.keys, -first_day * (1 << 32), side='right'))
+        self.stop = max(self.stop, self.start)
+
+        calories = self.calories[self.start:self.stop]
+        distance = self.distance[self.start:self.stop]
+        self.totals = [self.stop - self.start, float(np.nansum(calories)), float(np.nansum(distance))]
+
+    def window_size(self):
+        return self.stop - self.start
+
+    def in_window(self, day):
+        return ((self.first_day is None or day >= self.first_day)
+                and (self.last_day is None or day <= self.last_day))
+
+    def intern(self, description):
+        """Return the shared code for a description string"""
+        description = description or ""
+        code = self.desc_index.get(description)
+        if code is None:
+            code = len(self.descriptions)
+            self.desc_index[description] = code
+            self.descriptions.append(description)
+        return code
+
+    def position(self, fit_id, date):
+        """Row a workout would occupy in history order"""
+        key = sort_keys(day_number(date), fit_id)
+        return int(np.searchsorted(self.keys, key))
+
+    def insert(self, row, fit_id, date, calories, distance, description):
+        """Insert a workout at ``row`` (see position) and update the window"""
+        day = day_number(date)
+        calories = clean_number(calories)
+        distance = clean_number(distance)
+
+        self.ids = np.insert(self.ids, row, fit_id)
+        self.days = np.insert(self.days, row, day)
+        self.calories = np.insert(self.calories, row, calories)
+        self.distance = np.insert(self.distance, row, distance)
+        self.desc_codes = np.insert(self.desc_codes, row, self.intern(description))
+        self.keys = np.insert(self.keys, row, sort_keys(day, fit_id))
+        self.version += 1
+
+        if self.in_window(day):
+            self.stop += 1
+            self._adjust_totals(1, calories, distance)
+        elif self.last_day is not None and day > self.last_day:
+            self.start += 1
+            self.stop += 1
+
+    def rename(self, pairs):
+        """Give workouts new ids from (old id, new id) ``pairs``
+
+        Returns True if that changed the history order, which happens only
+        when a new id sorts differently among the workouts of its day.
+        """
+        new_ids = dict(pairs)
+        rows = np.flatnonzero(np.isin(self.ids, list(new_ids)))
+        if not len(rows):
+            return False
+        ids = self.ids.copy()
+        ids[rows] = [new_ids[fit_id] for fit_id in ids[rows].tolist()]
+        keys = self.keys.copy()
+        keys[rows] = sort_keys(self.days[rows], ids[rows])
+        self.ids, self.keys = ids, keys
+        self.version += 1
+        if np.all(keys[:-1] <= keys[1:]):
+            return False
+
+        # Days are unchanged, so the window bounds and totals still hold
+        order = np.argsort(keys, kind="stable")
+        for name in ("ids", "days", "calories", "distance", "desc_codes", "keys"):
+            setattr(self, name, getattr(self, name)[order])
+        return True
+
+    def remove_rows(self, rows):
+        """Remove the workouts at sorted, unique ``rows`` and update the window"""
+        rows = np.asarray(rows, dtype=np.int64)
+        inside = rows[(rows >= self.start) & (rows < self.stop)]
+        before = int(np.count_nonzero(rows < self.start))
+        if len(inside):
+            self.totals[0] -= len(inside)
+            self.totals[1] -= float(np.nansum(self.calories[inside]))
+            self.totals[2] -= float(np.nansum(self.distance[inside]))
+        self.start -= before
+        self.stop -= before + len(inside)
+
+        self.ids = np.delete(self.ids, rows)
+        self.days = np.delete(self.days, rows)
+        self.calories = np.delete(self.calories, rows)
+        self.distance = np.delete(self.distance, rows)
+        self.desc_codes = np.delete(self.desc_codes, rows)
+        self.keys = np.delete(self.keys, rows)
+        self.version += 1
+
+    def _adjust_totals(self, workouts, calories, distance):
+        self.totals[0] += workouts
+        self.totals[1] += 0.0 if np.isnan(calories) else float(calories)
+        self.totals[2] += 0.0 if np.isnan(distance) else float(distance)
+
+    def date(self, row):
+        """Display date for a row (empty if it could not be parsed)"""
+        day = self.days[row]
+        return "" if day == MISSING_DAY else str(np.datetime64(int(day), 'D'))
+
+    def description(self, row):
+        """Description text for a row from the interned store"""
+        return self.descriptions[self.desc_codes[row]]
+
+    def window_columns(self):
+        """Distance and calories arrays for the rows in the window"""
+        return self.distance[self.start:self.stop], self.calories[self.start:self.stop]
+
+    def window_days(self):
+        """Day numbers for the rows in the window"""
+        return self.days[self.start:self.stop]
+
+    def chart_points(self):
+        """Distance/calories pairs in the window, skipping empty or invalid values"""
+        return valid_points(*self.window_columns())
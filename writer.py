@@ -0,0 +1,177 @@
+# Imports
+import sqlite3
+import threading
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+import instrumentation
+
+
+INSERT_SQL = "INSERT INTO fitness (date, calories, distance, description) VALUES (?, ?, ?, ?)"
+
+
+class WorkoutWriter(QObject):
+    """Write-behind queue for workout inserts, committed in groups
+
+    ``add`` only queues a row, so the window shows a workout before it is on
+    disk. A writer thread commits everything queued in one transaction once
+    ``batch_size`` rows are waiting or ``delay`` seconds after the first,
+    so a burst of adds costs one fsync instead of one each. The database
+    assigns the ids, as AUTOINCREMENT would for any other client; each row
+    carries a ``key`` of the caller's choosing instead. A failed batch is
+    rolled back and retried row by row, so only rows that cannot be written
+    are reported. Outcomes wait in take_results; ``settled`` is delivered
+    queued on the GUI thread whenever there are new ones. If the thread
+    stops, from close or because the database cannot be opened, rows still
+    queued are reported as failures and ``add`` raises RuntimeError.
+    """
+
+    settled = pyqtSignal()
+
+    BATCH_SIZE = 200
+    DELAY = 0.25
+
+    def __init__(self, db_path, batch_size=None, delay=None, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.batch_size = batch_size or self.BATCH_SIZE
+        self.delay = self.DELAY if delay is None else delay
+        self.condition = threading.Condition()
+        self.queued = []
+        self.first_queued = 0.0
+        self.writing = 0
+        self.flushing = False
+        self.stopping = False
+        self.stopped = False
+        self.error = ""
+        self.saved = []
+        self.failures = []
+        self.thread = threading.Thread(target=self._run, name="workout writer", daemon=True)
+        self.thread.start()
+
+    def add(self, key, date, calories, distance, description):
+        """Queue one insert; returns at once"""
+        with self.condition:
+            if self.stopping or self.stopped:
+                raise RuntimeError(self.error or "the workout writer is closed")
+            if not self.queued:
+                self.first_queued = time.monotonic()
+            self.queued.append((key, (date, calories, distance, description)))
+            self.condition.notify()
+
+    def take_results(self):
+        """Outcomes since the last call: ``(saved, failures)``
+
+        ``saved`` lists (key, id) for every committed row; ``failures`` lists
+        (rows, message) with the (key, values) rows that could not be written.
+        """
+        with self.condition:
+            saved, failures = self.saved, self.failures
+            self.saved, self.failures = [], []
+        return saved, failures
+
+    def running(self):
+        """Whether add still accepts rows"""
+        with self.condition:
+            return not self.stopping and not self.stopped
+
+    def pending(self):
+        """Rows queued or being written"""
+        with self.condition:
+            return len(self.queued) + self.writing
+
+    def flush(self):
+        """Commit everything queued now and wait until it is written
+
+        Call before anything that reads or changes the table on another
+        connection (deletes, imports, reloads), then take_results: the
+        ``settled`` signal for these rows may not have been delivered yet.
+        Returns at once if the thread has stopped.
+        """
+        with self.condition:
+            self.flushing = True
+            self.condition.notify_all()
+            self.condition.wait_for(lambda: self.stopped or (not self.queued and not self.writing))
+            self.flushing = False
+
+    def close(self):
+        """Flush and stop the writer thread; later adds raise RuntimeError"""
+        with self.condition:
+            self.stopping = True
+            self.condition.notify_all()
+        self.thread.join()
+
+    def _next_batch(self):
+        # Wait for a full batch, the delay, a flush or close; None means stop
+        with self.condition:
+            while True:
+                if self.queued:
+                    wait = self.first_queued + self.delay - time.monotonic()
+                    if len(self.queued) >= self.batch_size or self.flushing or self.stopping or wait <= 0:
+                        batch, self.queued = self.queued, []
+                        self.writing = len(batch)
+                        return batch
+                    self.condition.wait(wait)
+                elif self.stopping:
+                    return None
+                else:
+                    self.condition.wait()
+
+    def _run(self):
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path)
+            while True:
+                batch = self._next_batch()
+                if batch is None:
+                    return
+                try:
+                    saved, failures = instrumentation.call("sql commit batch", self._write, conn, batch)
+                except Exception as e:
+                    # Keep the thread alive for later rows and flushes
+                    saved, failures = [], [(batch, str(e))]
+                with self.condition:
+                    self.saved.extend(saved)
+                    self.failures.extend(failures)
+                    self.writing = 0
+                    self.condition.notify_all()
+                self.settled.emit()
+        except Exception as e:
+            self.error = f"the workout writer stopped: {e}"
+        finally:
+            if conn is not None:
+                conn.close()
+            # Hand back whatever can no longer be written and wake flush
+            with self.condition:
+                self.stopped = True
+                leftover, self.queued = self.queued, []
+                if leftover:
+                    self.failures.append((leftover, self.error or "the workout writer is closed"))
+                self.writing = 0
+                self.condition.notify_all()
+            if leftover:
+                self.settled.emit()
+
+    def _write(self, conn, batch):
+        try:
+            with conn:
+                conn.executemany(INSERT_SQL, [values for _, values in batch])
+                # The write lock is held, so the ids are consecutive up to the last
+                last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        except sqlite3.Error:
+            return self._write_each(conn, batch)
+        first_id = last_id - len(batch) + 1
+        return [(key, first_id + index) for index, (key, _) in enumerate(batch)], []
+
+    def _write_each(self, conn, batch):
+        # The batch rolled back as a whole; find the rows that cannot be written
+        saved, rejected, message = [], [], ""
+        for key, values in batch:
+            try:
+                with conn:
+                    saved.append((key, conn.execute(INSERT_SQL, values).lastrowid))
+            except sqlite3.Error as e:
+                rejected.append((key, values))
+                message = message or str(e)
+        return saved, [(rejected, message)] if rejected else []